@@ -306,6 +306,1007 @@ def test_dependencies():
     return 0
 
 
+def make_zip(members, compression=None):
+    """
+    Return a BytesIO with a new archive holding the `members` dict
+    of name to content.
+    """
+    import io
+    import zipfile
+    if compression is None:
+        compression = zipfile.ZIP_STORED
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', compression) as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    archive.seek(0)
+    return archive
+
+
+def test_zipfile_buffer():
+    """
+    Check reading archives from a buffer and with use_mmap, where
+    stored members are not copied.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import zipfile
+
+    members = {'stored': b'stored data' * 100}
+    content = make_zip(members).getvalue()
+    with zipfile.ZipFile(content) as zf:
+        view = zf.getbuffer('stored')
+        if view != members['stored'] or view.obj is not content:
+            sys.stderr.write('"zipfile" buffer member is copied.\n')
+            return 194
+        view.release()
+
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with open(path, 'wb') as stream:
+            stream.write(content)
+        with zipfile.ZipFile(path, use_mmap=True) as zf:
+            view = zf.getbuffer('stored')
+            if view != members['stored'] or zf.read('stored') != view:
+                sys.stderr.write('"zipfile" mmap read is broken.\n')
+                return 195
+            view.release()
+    return 0
+
+
+def test_zipfile_concurrent_read():
+    """
+    Check members of an archive on disk read at the same time by
+    several threads, with interleaved reads.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import threading
+    import zipfile
+
+    members = {'member-%d' % index: os.urandom(100000) for index in range(8)}
+    errors = []
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with open(path, 'wb') as stream:
+            stream.write(make_zip(members, zipfile.ZIP_DEFLATED).getvalue())
+
+        with zipfile.ZipFile(path) as zf:
+            def read(name):
+                with zf.open(name) as member:
+                    chunks = iter(lambda: member.read(1000), b'')
+                    if b''.join(chunks) != members[name]:
+                        errors.append(name)
+
+            threads = [
+                threading.Thread(target=read, args=(name,))
+                for name in members]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    if errors:
+        sys.stderr.write(
+            '"zipfile" concurrent reads are broken: {}.\n'.format(errors))
+        return 228
+    return 0
+
+
+def test_zipfile_columnar():
+    """
+    Check that a columnar archive lists and reads the same members as
+    a regular one.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    members = {
+        'dir/': b'',
+        'dir/stored': b'stored data',
+        'dir/\u00e9t\u00e9': b'unicode name',
+        'deflated': b'deflated data' * 100,
+        }
+    content = make_zip(members, zipfile.ZIP_DEFLATED).getvalue()
+    fields = ('filename', 'orig_filename', 'date_time', 'compress_type',
+              'CRC', 'compress_size', 'file_size', 'header_offset',
+              'flag_bits', 'extra', 'comment')
+    with zipfile.ZipFile(content) as regular, \
+            zipfile.ZipFile(content, columnar=True) as columnar:
+        if columnar.namelist() != regular.namelist():
+            sys.stderr.write('"zipfile" columnar names differ.\n')
+            return 196
+        for name in regular.namelist():
+            expected = [getattr(regular.getinfo(name), field)
+                        for field in fields]
+            actual = [getattr(columnar.getinfo(name), field)
+                      for field in fields]
+            if actual != expected or columnar.read(name) != members[name]:
+                sys.stderr.write(
+                    '"zipfile" columnar member {} differs.\n'.format(name))
+                return 197
+    return 0
+
+
+def test_zipfile_index_cache():
+    """
+    Check that the index cache is used while the archive is unchanged,
+    and rewritten once it changed or got corrupted.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import zipfile
+
+    def read_all(path, cache):
+        with zipfile.ZipFile(path, index_cache=cache) as zf:
+            return {name: zf.read(name) for name in zf.namelist()}
+
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        cache = path + '.idx'
+        for count in (3, 5):
+            members = {
+                'member-%d' % index: b'data %d' % index
+                for index in range(count)}
+            with open(path, 'wb') as stream:
+                stream.write(make_zip(members).getvalue())
+            if read_all(path, cache) != members:
+                sys.stderr.write('"zipfile" index cache is stale.\n')
+                return 198
+            # A cache which is used is not written again.
+            os.utime(cache, ns=(0, 0))
+            if (read_all(path, cache) != members or
+                    os.stat(cache).st_mtime_ns != 0):
+                sys.stderr.write('"zipfile" index cache is not used.\n')
+                return 199
+
+        with open(cache, 'wb') as stream:
+            stream.write(b'not an index')
+        if read_all(path, cache) != members:
+            sys.stderr.write('"zipfile" bad index cache is used.\n')
+            return 200
+    return 0
+
+
+def test_zipfile_checkpoints():
+    """
+    Check seeking back and forth in a deflated member with checkpoints.
+
+    Return 0 on success, non zero on error.
+    """
+    import random
+    import zipfile
+
+    data = b''.join(b'line %d\n' % index for index in range(100000))
+    archive = make_zip({'member': data}, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(archive) as zf, zf.open('member') as member:
+        member.enable_checkpoints(span=1 << 16, build=True)
+        positions = random.Random(0).sample(range(len(data)), 50)
+        for position in positions + [0, len(data)]:
+            member.seek(position)
+            if member.read(100) != data[position:position + 100]:
+                sys.stderr.write('"zipfile" checkpoint seek is broken.\n')
+                return 201
+    return 0
+
+
+def test_zipfile_extract_hook():
+    """
+    Check that extract() reads the members through an overridden
+    ZipFile._ZipExtFile.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import zipfile
+
+    calls = []
+
+    class HookedZipExtFile(zipfile.ZipExtFile):
+        def read(self, n=-1):
+            calls.append(n)
+            return zipfile.ZipExtFile.read(self, n)
+
+    class HookedZipFile(zipfile.ZipFile):
+        _ZipExtFile = HookedZipExtFile
+
+    content = b'hooked content' * 1024
+    with tempfile.TemporaryDirectory() as target:
+        with HookedZipFile(make_zip({'member': content})) as zf:
+            path = zf.extract('member', target)
+        with open(path, 'rb') as stream:
+            extracted = stream.read()
+
+    if extracted != content or not calls:
+        sys.stderr.write('"zipfile" extract skips _ZipExtFile.read.\n')
+        return 180
+    return 0
+
+
+def test_zipfile_read_memory():
+    """
+    Check that reading a large member allocates about its size, for
+    stored and deflated members.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import tracemalloc
+    import zipfile
+
+    size = 1 << 24
+    block = os.urandom(1 << 16)
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with zipfile.ZipFile(path, 'w') as zf:
+            for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                zinfo = zipfile.ZipInfo('member-%d' % compression)
+                zinfo.compress_type = compression
+                with zf.open(zinfo, 'w') as member:
+                    for _ in range(size // len(block)):
+                        member.write(block)
+
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                tracemalloc.start()
+                try:
+                    data = zf.read(name)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                if len(data) != size:
+                    sys.stderr.write('"zipfile" read is broken.\n')
+                    return 189
+                del data
+                if peak > size * 1.5:
+                    sys.stderr.write(
+                        '"zipfile" read of {} peaked at {:.2f}x its '
+                        'size.\n'.format(name, peak / size))
+                    return 190
+    return 0
+
+
+def test_zipfile_batch_read():
+    """
+    Check reading many members at once, in batches and on threads.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    members = {
+        'member-%03d' % index: os.urandom(index) * 10
+        for index in range(100)}
+    archive = make_zip(members, zipfile.ZIP_DEFLATED)
+    names = sorted(members, reverse=True)
+    with zipfile.ZipFile(archive) as zf:
+        # Tiny batches, so the members are split in many of them.
+        zf.MAX_BATCH_READ = 4096
+        for max_workers in (None, 4):
+            if zf.read_many(names, max_workers=max_workers) != members:
+                sys.stderr.write('"zipfile" read_many is broken.\n')
+                return 202
+            items = list(zf.iter_read(
+                [zf.getinfo(name) for name in names],
+                max_workers=max_workers))
+            if ([zinfo.filename for zinfo, _ in items] != sorted(names) or
+                    any(data != members[zinfo.filename]
+                        for zinfo, data in items)):
+                sys.stderr.write('"zipfile" iter_read is broken.\n')
+                return 203
+    return 0
+
+
+def test_zipfile_data_offsets():
+    """
+    Check that the data offsets cached for opened members are bounded.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    members = {'member-%d' % index: b'data %d' % index for index in range(64)}
+    with zipfile.ZipFile(make_zip(members)) as zf:
+        zf.MAX_DATA_OFFSETS = 8
+        for _ in range(2):
+            for name in members:
+                with zf.open(name) as member:
+                    if member.read() != members[name]:
+                        sys.stderr.write('"zipfile" open is broken.\n')
+                        return 185
+        if len(zf._data_offsets) > zf.MAX_DATA_OFFSETS:
+            sys.stderr.write('"zipfile" data offsets are not bounded.\n')
+            return 186
+    return 0
+
+
+def test_zipfile_readahead():
+    """
+    Check reading members with background read-ahead, and that closing
+    a member read partially stops its thread.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import threading
+    import time
+    import zipfile
+
+    def is_reading():
+        return any(thread.name == 'zipfile-readahead'
+                   for thread in threading.enumerate())
+
+    members = {'deflated': os.urandom(1 << 20) * 2}
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with open(path, 'wb') as stream:
+            stream.write(make_zip(members, zipfile.ZIP_DEFLATED).getvalue())
+        with zipfile.ZipFile(path) as zf:
+            with zf.open('deflated') as member:
+                member.enable_readahead(block_size=1 << 16)
+                chunks = iter(lambda: member.read(10000), b'')
+                if b''.join(chunks) != members['deflated']:
+                    sys.stderr.write('"zipfile" read-ahead is broken.\n')
+                    return 204
+            with zf.open('deflated') as member:
+                member.enable_readahead(block_size=1 << 16)
+                member.read(10000)
+                if not is_reading():
+                    sys.stderr.write('"zipfile" read-ahead is not used.\n')
+                    return 204
+
+    for _ in range(50):
+        if not is_reading():
+            return 0
+        time.sleep(0.1)
+    sys.stderr.write('"zipfile" read-ahead thread is not stopped.\n')
+    return 205
+
+
+def test_zipfile_member_cache():
+    """
+    Check the byte budgeted cache of read().
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    members = {'member-%d' % index: os.urandom(1000) for index in range(5)}
+    archive = make_zip(members, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(archive, cache_size=2500) as zf:
+        for name in ('member-0', 'member-1', 'member-0', 'member-2'):
+            if zf.read(name) != members[name]:
+                sys.stderr.write('"zipfile" cached read is broken.\n')
+                return 206
+        info = zf.cache_info()
+        # member-1 was dropped to keep member-0 and member-2.
+        if (info.hits, info.misses, info.evictions, info.currsize) != (
+                1, 3, 1, 2000):
+            sys.stderr.write(
+                '"zipfile" unexpected cache info {}.\n'.format(info))
+            return 207
+        zf.cache_clear()
+        if zf.cache_info().currsize != 0:
+            sys.stderr.write('"zipfile" cache is not cleared.\n')
+            return 208
+    return 0
+
+
+def test_zipfile_lines():
+    """
+    Check iterating the lines of a deflated text member, as bytes and
+    decoded.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    text = ''.join(
+        'line \u00e9 %d\r\n' % index if index % 3 else 'x' * index + '\n'
+        for index in range(5000)) + 'no newline'
+    lines = [line + '\n' for line in text.split('\n')[:-1]] + ['no newline']
+    archive = make_zip({'text': text.encode('utf-8')}, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(archive) as zf:
+        with zf.open('text') as member:
+            actual = list(member.iter_lines(chunk_size=1000))
+        if actual != [line.encode('utf-8') for line in lines]:
+            sys.stderr.write('"zipfile" iter_lines is broken.\n')
+            return 209
+        with zf.open('text') as member:
+            actual = list(member.iter_lines(encoding='utf-8', chunk_size=999))
+        if actual != lines:
+            sys.stderr.write('"zipfile" decoded iter_lines is broken.\n')
+            return 210
+    return 0
+
+
+def test_zipfile_raw():
+    """
+    Check reading members as stored, and deflated members as gzip
+    streams.
+
+    Return 0 on success, non zero on error.
+    """
+    import gzip
+    import zipfile
+    import zlib
+
+    data = b'compressible data ' * 1000
+    archive = make_zip({'member': data}, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(archive) as zf:
+        with zf.open_raw('member') as raw:
+            compressed = raw.read()
+        if (len(compressed) != zf.getinfo('member').compress_size or
+                zlib.decompress(compressed, -15) != data):
+            sys.stderr.write('"zipfile" open_raw is broken.\n')
+            return 211
+        with zf.open_gzip('member') as stream:
+            if gzip.decompress(stream.read()) != data:
+                sys.stderr.write('"zipfile" open_gzip is broken.\n')
+                return 212
+    return 0
+
+
+def test_zipfile_sendfile():
+    """
+    Check sending ranges of a stored member to a socket, and to a file
+    for an archive not opened from a path.
+
+    Return 0 on success, non zero on error.
+    """
+    import io
+    import socket
+    import tempfile
+    import threading
+    import zipfile
+
+    data = os.urandom(1 << 18)
+    archive = make_zip({'member': data})
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with open(path, 'wb') as stream:
+            stream.write(archive.getvalue())
+
+        sender, receiver = socket.socketpair()
+        received = []
+
+        def receive():
+            with receiver:
+                received.extend(iter(lambda: receiver.recv(1 << 16), b''))
+
+        thread = threading.Thread(target=receive)
+        thread.start()
+        with sender, zipfile.ZipFile(path) as zf:
+            sent = zf.sendfile('member', sender)
+            sent += zf.sendfile('member', sender, offset=1000, count=5000)
+        thread.join()
+        if (sent != len(data) + 5000 or
+                b''.join(received) != data + data[1000:6000]):
+            sys.stderr.write('"zipfile" sendfile to socket is broken.\n')
+            return 213
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(archive) as zf:
+        zf.sendfile('member', out, offset=len(data) - 10)
+    if out.getvalue() != data[-10:]:
+        sys.stderr.write('"zipfile" sendfile to file is broken.\n')
+        return 214
+    return 0
+
+
+def test_zipfile_nested():
+    """
+    Check that nested archives are read, and that opening one again
+    reuses its central directory.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    members = {'member-%d' % index: b'data %d' % index for index in range(3)}
+    inner = make_zip(members).getvalue()
+    outer = make_zip({'inner.zip': inner}, zipfile.ZIP_DEFLATED)
+    with zipfile.ZipFile(outer) as zf:
+        with zf.open_archive('inner.zip') as first:
+            first.getinfo('member-1').filename = 'changed'
+        with zf.open_archive('inner.zip') as second:
+            if ({name: second.read(name) for name in second.namelist()}
+                    != members):
+                sys.stderr.write('"zipfile" nested archive is broken.\n')
+                return 187
+            if second._central_dir._data is not first._central_dir._data:
+                sys.stderr.write(
+                    '"zipfile" nested central directory not cached.\n')
+                return 188
+    return 0
+
+
+def test_zipfile_stream_reader():
+    """
+    Check reading an archive from a pipe.  The members are written to a
+    stream which is not seekable, so they have a data descriptor.
+
+    Return 0 on success, non zero on error.
+    """
+    import io
+    import threading
+    import zipfile
+
+    class Unseekable(io.RawIOBase):
+        def __init__(self):
+            self.data = io.BytesIO()
+
+        def writable(self):
+            return True
+
+        def write(self, data):
+            return self.data.write(data)
+
+    members = {
+        'stored': os.urandom(5000),
+        'deflated': b'deflated data' * 1000,
+        'skipped': b'skipped data' * 1000,
+        'described': os.urandom(3000),
+        }
+    output = Unseekable()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('stored', members['stored'], zipfile.ZIP_STORED)
+        zf.writestr('deflated', members['deflated'])
+        for name in ('skipped', 'described'):
+            # Stored without sizes in the local header.
+            zinfo = zipfile.ZipInfo(name)
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with zf.open(zinfo, 'w') as member:
+                member.write(members[name])
+    content = output.data.getvalue()
+
+    read_fd, write_fd = os.pipe()
+
+    def write():
+        with os.fdopen(write_fd, 'wb') as stream:
+            stream.write(content)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        with os.fdopen(read_fd, 'rb') as stream, \
+                zipfile.ZipStreamReader(stream) as reader:
+            for zinfo, member in reader:
+                if zinfo.filename == 'skipped':
+                    member.read(10)
+                elif member.read() != members[zinfo.filename]:
+                    sys.stderr.write('"zipfile" stream read is broken.\n')
+                    return 215
+            if [zinfo.filename for zinfo in reader.infolist()] != list(
+                    members):
+                sys.stderr.write(
+                    '"zipfile" stream central directory is broken.\n')
+                return 216
+    finally:
+        thread.join()
+    return 0
+
+
+def test_zipfile_http():
+    """
+    Check reading an archive over HTTP range requests from a local
+    server, including short and failed responses.
+
+    Return 0 on success, non zero on error.
+    """
+    import http.server
+    import threading
+    import zipfile
+
+    members = {
+        'member-%d' % index: os.urandom(1000 * index) for index in range(20)}
+    content = make_zip(members, zipfile.ZIP_DEFLATED).getvalue()
+    # How the server answers GET requests: 'ok', 'short' or 'fail'.
+    answer = ['ok']
+
+    class RangeHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+
+        def do_GET(self):
+            if answer[0] == 'fail':
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start, end = self.headers['Range'][6:].split('-')
+            body = content[int(start):int(end) + 1]
+            if answer[0] == 'short':
+                body = body[:len(body) // 2]
+            self.send_response(206)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:%d/archive.zip' % server.server_address[1]
+    try:
+        remote = zipfile.BlockCacheFile(
+            zipfile.HTTPRangeBackend(url), block_size=4096)
+        with zipfile.ZipFile(remote) as zf:
+            remote.seek(5000)
+            if remote.read(10000) != content[5000:15000]:
+                sys.stderr.write('"zipfile" HTTP range read is broken.\n')
+                return 191
+            for name in zf.namelist():
+                if zf.read(name) != members[name]:
+                    sys.stderr.write('"zipfile" HTTP member read is broken.\n')
+                    return 191
+            requests = remote.requests
+            zf.read('member-10')
+            if remote.requests != requests:
+                sys.stderr.write('"zipfile" HTTP blocks are not cached.\n')
+                return 192
+        remote.close()
+
+        for mode in ('short', 'fail'):
+            answer[0] = mode
+            remote = zipfile.BlockCacheFile(
+                zipfile.HTTPRangeBackend(url), block_size=4096)
+            try:
+                remote.read(10000)
+            except OSError:
+                pass
+            else:
+                sys.stderr.write(
+                    '"zipfile" HTTP {} response not raised.\n'.format(mode))
+                return 193
+            finally:
+                remote.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+def test_zipfile_pool():
+    """
+    Check sharing, eviction and replacement of pooled archives.
+
+    Return 0 on success, non zero on error.
+    """
+    import tempfile
+    import zipfile
+
+    def write(path, members):
+        with open(path + '.tmp', 'wb') as stream:
+            stream.write(make_zip(members).getvalue())
+        os.replace(path + '.tmp', path)
+
+    pool = zipfile.ZipFilePool(max_open=1, check_interval=0)
+    with tempfile.TemporaryDirectory() as temp:
+        first = os.path.join(temp, 'first.zip')
+        second = os.path.join(temp, 'second.zip')
+        write(first, {'first': b'first data'})
+        write(second, {'second': b'old data'})
+
+        shared = pool.acquire(first)
+        if pool.acquire(first) is not shared:
+            sys.stderr.write('"zipfile" pooled archive is not shared.\n')
+            return 217
+        pool.release(shared)
+        pool.release(shared)
+        with pool.open(second) as zf:
+            if zf.read('second') != b'old data' or shared.fp is not None:
+                sys.stderr.write('"zipfile" pooled archive not evicted.\n')
+                return 218
+            # Replaced while in use, the old archive stays usable.
+            write(second, {'second': b'new data', 'other': b''})
+            with pool.open(second) as replaced:
+                if (replaced is zf or zf.read('second') != b'old data' or
+                        replaced.read('second') != b'new data'):
+                    sys.stderr.write(
+                        '"zipfile" pooled archive replacement is broken.\n')
+                    return 219
+        if zf.fp is not None:
+            sys.stderr.write('"zipfile" replaced archive is not closed.\n')
+            return 219
+        pool.clear()
+
+    try:
+        pool.release(shared)
+    except ValueError:
+        return 0
+    sys.stderr.write('"zipfile" pool releases unknown archives.\n')
+    return 220
+
+
+def test_zipfile_pickle():
+    """
+    Check that a pickled archive opens again with its own arguments.
+
+    Return 0 on success, non zero on error.
+    """
+    import pickle
+    import tempfile
+    import zipfile
+
+    members = {'member-%d' % index: b'data %d' % index for index in range(3)}
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'archive.zip')
+        with open(path, 'wb') as stream:
+            stream.write(make_zip(members).getvalue())
+
+        for columnar in (False, True):
+            with zipfile.ZipFile(path, columnar=columnar) as zf:
+                copy = pickle.loads(pickle.dumps(zf))
+            with copy:
+                if ({name: copy.read(name) for name in copy.namelist()}
+                        != members):
+                    sys.stderr.write('"zipfile" unpickled badly.\n')
+                    return 183
+                if isinstance(copy.filelist, list) == columnar:
+                    sys.stderr.write(
+                        '"zipfile" unpickled with other arguments.\n')
+                    return 184
+    return 0
+
+
+def test_zipfile_decrypt():
+    """
+    Check reading members encrypted with ZipCrypto by Info-ZIP.
+
+    Return 0 on success, non zero on error.
+    """
+    import base64
+    import io
+    import zipfile
+
+    # zip -P secret -0 encrypted.zip stored
+    # zip -P secret -9 encrypted.zip deflated
+    content = base64.b64decode(
+        'UEsDBAoACQAAAHGYUl048cBxGgAAAA4AAAAGAAAAc3RvcmVk1x9zT0MDPxOhpoBbpJA2'
+        '5c44B7Fqwpq2prFQSwcIOPHAcRoAAAAOAAAAUEsDBBQACwAIAHGYUl244zR52wEAADIP'
+        'AAAIAAAAZGVmbGF0ZWQmdvxukh/Y7EFF8yqT5TtC6A33XIbsZUei+MKaN2m2QbL2eYGU'
+        'ceKeLKlQiWMUH59/qpQ/frTKrvpn/476PMZLh7Iac/WZnCj8dXy4/wPhmI/P5kKsvpXy'
+        'd9RPOyA1AYpw6f8crdzyc51cFYPtV1QOa9cYmszaXcIv7kiD78Hieo96fX6K17mJ/qBK'
+        'IYPDg1xMaji7Y0PztbIGC9TksJAKmRYsbktrhjZZeMeBCi3wwuWzGDmK3LbBj3Igoz80'
+        'STb3EuL8B+T/j/vpT8B/93CDNhex4BYPah+au1QBfmIUi9w1ixwPHT0e23IlZzspx+Au'
+        'BLiqtBwCM/9E/lpZq2sh0usKQmAI0cdmPrDVTWCzcyReG3Ti09SzDSNSwv1Grpr119+X'
+        'R5RIOoDq9HFHI6BanspIOcrCPXnwkia1g+uwR6e2VJwAXw7bOeTlwMO92x10q6EDXu11'
+        '6scDAk0koeu/El1TK33cznezZielmDXfu9BPKGNTdlPmwMAH3ZoZVKYFACt5VGZ8QujP'
+        '4KGhNt66egU784feBAA0SNf/8ev26rbMmsgwLjMtwpMyemDGXOyNmeD/l7lpvRBMCcFj'
+        'i4RgX6HA/YpjodQHanYa9otDslsUbr/Zpcl0tQG6UEsHCLjjNHnbAQAAMg8AAFBLAQIe'
+        'AwoACQAAAHGYUl048cBxGgAAAA4AAAAGAAAAAAAAAAAAAACkgQAAAABzdG9yZWRQSwEC'
+        'HgMUAAsACABxmFJduOM0edsBAAAyDwAACAAAAAAAAAABAAAApIFOAAAAZGVmbGF0ZWRQ'
+        'SwUGAAAAAAIAAgBqAAAAXwIAAAAA'
+        )
+    members = {
+        'stored': b'stored secret\n',
+        'deflated': b''.join(
+            b'deflated secret %d\n' % index for index in range(200)),
+        }
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        for name, data in members.items():
+            with zf.open(name, pwd=b'secret') as member:
+                chunks = iter(lambda: member.read(100), b'')
+                if b''.join(chunks) != data:
+                    sys.stderr.write('"zipfile" decryption is broken.\n')
+                    return 221
+        try:
+            zf.read('deflated', pwd=b'wrong')
+        except RuntimeError:
+            return 0
+    sys.stderr.write('"zipfile" bad password is not detected.\n')
+    return 222
+
+
+def test_zipfile_async():
+    """
+    Check the asyncio interface of the patched zipfile, including a
+    consumer of iter_read() cancelled while a member is read.
+
+    Return 0 on success, non zero on error.
+    """
+    import asyncio
+    import threading
+    import zipfile
+
+    members = {'member-%d' % index: b'data %d' % index for index in range(3)}
+    reading = threading.Event()
+    release = threading.Event()
+
+    class BlockingZipFile(zipfile.ZipFile):
+        """
+        Block iter_read() on the executor until released.
+        """
+        def iter_read(self, names, pwd=None):
+            for item in zipfile.ZipFile.iter_read(self, names, pwd):
+                reading.set()
+                release.wait(10)
+                yield item
+
+    async def check_read():
+        async with await zipfile.AsyncZipFile.create(
+                make_zip(members)) as azf:
+            if await azf.read('member-1') != members['member-1']:
+                return False
+            if await azf.read_many(azf.namelist()) != members:
+                return False
+        return True
+
+    async def check_cancel():
+        azf = zipfile.AsyncZipFile(BlockingZipFile(make_zip(members)))
+
+        async def consume():
+            async for _ in azf.iter_read(azf.namelist()):
+                pass
+
+        task = asyncio.ensure_future(consume())
+        while not reading.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        # Release next() only after the cancellation reached the consumer.
+        asyncio.get_running_loop().call_later(0.1, release.set)
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await azf.close()
+
+    try:
+        if not asyncio.run(check_read()):
+            sys.stderr.write('"zipfile" async read is broken.\n')
+            return 181
+        asyncio.run(check_cancel())
+    except Exception as error:
+        sys.stderr.write(
+            '"zipfile" async iter_read cancel failed. {}\n'.format(error))
+        return 182
+    return 0
+
+
+def test_zipfile_name_index():
+    """
+    Check listing directories and globbing with the name index, for
+    the archive and zipfile.Path.
+
+    Return 0 on success, non zero on error.
+    """
+    import zipfile
+
+    names = ['a/b/c.txt', 'a/d.txt', 'top.txt', 'e/', 'a/b/f.py']
+    archive = make_zip(dict.fromkeys(names, b''))
+    with zipfile.ZipFile(archive, 'a') as zf:
+        results = [
+            zf.listdir(),
+            zf.listdir('a'),
+            zf.names_with_prefix('a/b/'),
+            zf.glob('a/**/*.txt'),
+            zf.glob('*/b'),
+            [path.name for path in zipfile.Path(zf, 'a/').iterdir()],
+            ]
+        expected = [
+            ['top.txt', 'e/', 'a/'],
+            ['a/d.txt', 'a/b/'],
+            ['a/b/c.txt', 'a/b/f.py', 'a/b/'],
+            ['a/b/c.txt', 'a/d.txt'],
+            ['a/b/'],
+            ['d.txt', 'b'],
+            ]
+        if results != expected:
+            sys.stderr.write(
+                '"zipfile" name index is broken. {}\n'.format(results))
+            return 223
+        try:
+            zf.listdir('missing')
+        except KeyError:
+            pass
+        else:
+            sys.stderr.write('"zipfile" lists missing directories.\n')
+            return 223
+        # The index follows the members added later.
+        zf.writestr('x/y.txt', b'')
+        if (zf.listdir('x') != ['x/y.txt'] or
+                not zipfile.Path(zf, 'x/y.txt').exists()):
+            sys.stderr.write('"zipfile" name index is stale.\n')
+            return 224
+    return 0
+
+
+def test_zipfile_write_many():
+    """
+    Check adding a directory tree with write_many(), on threads and
+    processes, with files spilled to disk.
+
+    Return 0 on success, non zero on error.
+    """
+    import io
+    import tempfile
+    import zipfile
+
+    members = {
+        'tree/a.txt': b'a' * 100,
+        'tree/sub/b.bin': os.urandom(5000),
+        'tree/sub/c.txt': b'c' * 50000,
+        'tree/z.txt': b'',
+        }
+    with tempfile.TemporaryDirectory() as temp:
+        for name, data in members.items():
+            path = os.path.join(temp, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as stream:
+                stream.write(data)
+
+        archives = []
+        for max_workers, use_processes in ((1, False), (4, False), (2, True)):
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+                # Files over 1000 bytes are compressed to temporary files.
+                zf.MAX_SPILL_MEMORY = 1000
+                zf.write_many(
+                    [(os.path.join(temp, 'tree'), 'tree')],
+                    max_workers=max_workers, use_processes=use_processes)
+            archives.append(archive.getvalue())
+
+    with zipfile.ZipFile(io.BytesIO(archives[0])) as zf:
+        files = {
+            name: zf.read(name) for name in zf.namelist()
+            if not name.endswith('/')}
+        directories = [name for name in zf.namelist() if name.endswith('/')]
+    if files != members or directories != ['tree/', 'tree/sub/']:
+        sys.stderr.write('"zipfile" write_many is broken.\n')
+        return 225
+    if archives[1:] != archives[:1] * 2:
+        sys.stderr.write('"zipfile" write_many output is not stable.\n')
+        return 226
+    return 0
+
+
+def test_zipfile_parallel_deflate():
+    """
+    Check compressing single members on several threads.
+
+    Return 0 on success, non zero on error.
+    """
+    import io
+    import tempfile
+    import zipfile
+
+    # Several compression blocks, compressible and not.
+    data = (b'compressible data ' * 100000) + os.urandom(1 << 20)
+    archive = io.BytesIO()
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'source')
+        with open(path, 'wb') as stream:
+            stream.write(data)
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            with zf.open('opened', 'w', max_workers=4) as member:
+                for start in range(0, len(data), 100003):
+                    member.write(data[start:start + 100003])
+            zf.write(path, 'written', max_workers=2)
+
+    with zipfile.ZipFile(archive) as zf:
+        for name in ('opened', 'written'):
+            zinfo = zf.getinfo(name)
+            # read() checks the CRC-32 computed from the blocks.
+            if (zf.read(name) != data or zinfo.file_size != len(data) or
+                    zinfo.compress_size >= len(data)):
+                sys.stderr.write(
+                    '"zipfile" parallel deflate of {} is broken.\n'.format(
+                        name))
+                return 227
+    return 0
+
+
 def main():
     """
     Launch tests to check required modules and OS-specific dependencies.
@@ -442,6 +1443,30 @@ def main():
             print('pywin32 %s' % (pywin32_version))
 
 
+    exit_code = test_zipfile_buffer() or exit_code
+    exit_code = test_zipfile_concurrent_read() or exit_code
+    exit_code = test_zipfile_columnar() or exit_code
+    exit_code = test_zipfile_index_cache() or exit_code
+    exit_code = test_zipfile_checkpoints() or exit_code
+    exit_code = test_zipfile_extract_hook() or exit_code
+    exit_code = test_zipfile_read_memory() or exit_code
+    exit_code = test_zipfile_batch_read() or exit_code
+    exit_code = test_zipfile_data_offsets() or exit_code
+    exit_code = test_zipfile_readahead() or exit_code
+    exit_code = test_zipfile_member_cache() or exit_code
+    exit_code = test_zipfile_lines() or exit_code
+    exit_code = test_zipfile_raw() or exit_code
+    exit_code = test_zipfile_sendfile() or exit_code
+    exit_code = test_zipfile_nested() or exit_code
+    exit_code = test_zipfile_stream_reader() or exit_code
+    exit_code = test_zipfile_http() or exit_code
+    exit_code = test_zipfile_pool() or exit_code
+    exit_code = test_zipfile_pickle() or exit_code
+    exit_code = test_zipfile_async() or exit_code
+    exit_code = test_zipfile_decrypt() or exit_code
+    exit_code = test_zipfile_name_index() or exit_code
+    exit_code = test_zipfile_write_many() or exit_code
+    exit_code = test_zipfile_parallel_deflate() or exit_code
     exit_code = test_dependencies() or exit_code
     sys.exit(exit_code)
 
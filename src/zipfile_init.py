@@ -7,7 +7,12 @@ Read and write ZIP files.
 
 XXX references to utf-8 need further investigation.
 """
+import array
 import binascii
+import bisect
+import codecs
+import collections.abc
+import functools
 import importlib.util
 import io
 import os
@@ -17,6 +22,7 @@ import struct
 import sys
 import threading
 import time
+import weakref
 
 try:
     import zlib # We may need its compression method
@@ -43,7 +49,8 @@ except ImportError:
 __all__ = ["BadZipFile", "BadZipfile", "error",
            "ZIP_STORED", "ZIP_DEFLATED", "ZIP_BZIP2", "ZIP_LZMA",
            "ZIP_ZSTANDARD", "is_zipfile", "ZipInfo", "ZipFile", "PyZipFile",
-           "LargeZipFile", "Path"]
+           "LargeZipFile", "Path", "ZipStreamReader", "BlockCacheFile",
+           "HTTPRangeBackend", "ZipFilePool", "AsyncZipFile"]
 
 class BadZipFile(Exception):
     pass
@@ -199,6 +206,16 @@ _CD64_OFFSET_START_CENTDIR = 9
 
 _DD_SIGNATURE = 0x08074b50
 
+# CHEVAH-FIX
+# The header of the central directory index cache, written by ZipFile when
+# index_cache is used.  It is followed by the metadata encoding, the raw
+# central directory, the columns and the names which are not decoded
+# straight from the central directory.
+structIndexHeader = "<8sHBQqLHqQQQ"
+stringIndexHeader = b"PKindex\0"
+sizeIndexHeader = struct.calcsize(structIndexHeader)
+_INDEX_VERSION = 1
+
 
 class _Extra(bytes):
     FIELD_STRUCT = struct.Struct('<HH')
@@ -236,6 +253,28 @@ class _Extra(bytes):
         )
 
 
+# CHEVAH-FIX
+def _is_buffer(obj):
+    """Return True if obj supports the buffer protocol."""
+    try:
+        memoryview(obj).release()
+    except TypeError:
+        return False
+    return True
+
+
+# CHEVAH-FIX
+def _is_buffer_archive(file):
+    """Return True if ZipFile reads file as a buffer: file supports the
+    buffer protocol and has no file interface, or is a memory mapping,
+    which has both."""
+    if hasattr(file, 'read'):
+        mmap = sys.modules.get('mmap')
+        if mmap is None or not isinstance(file, mmap.mmap):
+            return False
+    return _is_buffer(file)
+
+
 def _check_zipfile(fp):
     try:
         endrec = _EndRecData(fp)
@@ -273,6 +312,17 @@ def is_zipfile(filename):
         pass
     return result
 
+# CHEVAH-FIX
+def _unpack_file_header(data):
+    """Unpack and check the local file header at the start of data."""
+    if len(data) < sizeFileHeader:
+        raise BadZipFile("Truncated file header")
+    fheader = struct.unpack_from(structFileHeader, data)
+    if fheader[_FH_SIGNATURE] != stringFileHeader:
+        raise BadZipFile("Bad magic number for file header")
+    return fheader
+
+
 def _handle_prepended_data(endrec, debug=0):
     size_cd = endrec[_ECD_SIZE]             # bytes in central directory
     offset_cd = endrec[_ECD_OFFSET]         # offset of central directory
@@ -722,39 +772,51 @@ def _gen_crc(crc):
 #     zd = _ZipDecrypter(mypwd)
 #     plain_bytes = zd(cypher_bytes)
 
+# CHEVAH-FIX
+# The key stream byte only depends on the low 16 bits of key2, so it is
+# looked up in a table of 64 KiB built on first use.
+_streamtable = None
+
 def _ZipDecrypter(pwd):
     key0 = 305419896
     key1 = 591751049
     key2 = 878082192
 
-    global _crctable
+    global _crctable, _streamtable
     if _crctable is None:
-        _crctable = list(map(_gen_crc, range(256)))
+        _crctable = tuple(map(_gen_crc, range(256)))
+    if _streamtable is None:
+        _streamtable = bytes((((k | 2) * ((k | 2) ^ 1)) >> 8) & 0xFF
+                             for k in range(1 << 16))
     crctable = _crctable
+    streamtable = _streamtable
 
-    def crc32(ch, crc):
-        """Compute the CRC32 primitive on one byte."""
-        return (crc >> 8) ^ crctable[(crc ^ ch) & 0xFF]
-
-    def update_keys(c):
-        nonlocal key0, key1, key2
-        key0 = crc32(c, key0)
-        key1 = (key1 + (key0 & 0xFF)) & 0xFFFFFFFF
-        key1 = (key1 * 134775813 + 1) & 0xFFFFFFFF
-        key2 = crc32(key1 >> 24, key2)
-
-    for p in pwd:
-        update_keys(p)
+    # CHEVAH-FIX
+    # The key updates are inlined, and the keys kept in local variables
+    # while decrypting, as calls and cell variables dominate the cost of
+    # the loop.
+    for c in pwd:
+        key0 = crctable[(key0 ^ c) & 0xFF] ^ (key0 >> 8)
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = crctable[(key2 ^ (key1 >> 24)) & 0xFF] ^ (key2 >> 8)
 
     def decrypter(data):
         """Decrypt a bytes object."""
+        nonlocal key0, key1, key2
+        k0 = key0
+        k1 = key1
+        k2 = key2
         result = bytearray()
         append = result.append
         for c in data:
-            k = key2 | 2
-            c ^= ((k * (k^1)) >> 8) & 0xFF
-            update_keys(c)
+            c ^= streamtable[k2 & 0xFFFF]
             append(c)
+            k0 = crctable[(k0 ^ c) & 0xFF] ^ (k0 >> 8)
+            k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            k2 = crctable[(k2 ^ (k1 >> 24)) & 0xFF] ^ (k2 >> 8)
+        key0 = k0
+        key1 = k1
+        key2 = k2
         return bytes(result)
 
     return decrypter
@@ -810,6 +872,13 @@ class LZMADecompressor:
         self.eof = self._decomp.eof
         return result
 
+    # CHEVAH-FIX
+    @property
+    def unused_data(self):
+        if self._decomp is None:
+            return b''
+        return self._decomp.unused_data
+
 
 compressor_names = {
     0: 'store',
@@ -893,19 +962,54 @@ def _get_decompressor(compress_type):
             raise NotImplementedError("compression type %d" % (compress_type,))
 
 
+# CHEVAH-FIX
+def _pread(fd, n, pos):
+    """Read up to n bytes at offset pos, without changing the file position.
+
+    Like the read() of buffered files, it only returns fewer than n bytes
+    at the end of the file.
+    """
+    data = os.pread(fd, n, pos)
+    if len(data) == n or not data:
+        return data
+    chunks = [data]
+    size = len(data)
+    while size < n:
+        data = os.pread(fd, n - size, pos + size)
+        if not data:
+            break
+        chunks.append(data)
+        size += len(data)
+    return b''.join(chunks)
+
+
 class _SharedFile:
-    def __init__(self, file, pos, close, lock, writing):
+    def __init__(self, file, pos, close, lock, writing, fd=None):
         self._file = file
         self._pos = pos
         self._close = close
         self._lock = lock
         self._writing = writing
         self.seekable = file.seekable
+        # CHEVAH-FIX
+        # With a file descriptor, reads are positional and don't need the
+        # lock, so readers of the same archive don't wait for each other.
+        self._fd = fd
 
     def tell(self):
         return self._pos
 
     def seek(self, offset, whence=0):
+        # CHEVAH-FIX
+        if self._fd is not None:
+            if whence == os.SEEK_CUR:
+                offset += self._pos
+            elif whence == os.SEEK_END:
+                offset += os.fstat(self._fd).st_size
+            if offset < 0:
+                raise OSError("Negative seek position %d" % (offset,))
+            self._pos = offset
+            return self._pos
         with self._lock:
             if self._writing():
                 raise ValueError("Can't reposition in the ZIP file while "
@@ -919,6 +1023,13 @@ class _SharedFile:
             return self._pos
 
     def read(self, n=-1):
+        # CHEVAH-FIX
+        if self._fd is not None:
+            if n is None or n < 0:
+                n = max(os.fstat(self._fd).st_size - self._pos, 0)
+            data = _pread(self._fd, n, self._pos)
+            self._pos += len(data)
+            return data
         with self._lock:
             if self._writing():
                 raise ValueError("Can't read from the ZIP file while there "
@@ -929,12 +1040,614 @@ class _SharedFile:
             self._pos = self._file.tell()
             return data
 
+    # CHEVAH-FIX
+    def readinto(self, b):
+        if self._fd is not None:
+            if hasattr(os, 'preadv'):
+                n = os.preadv(self._fd, [b], self._pos)
+            else:
+                data = os.pread(self._fd, len(b), self._pos)
+                n = len(data)
+                b[:n] = data
+            self._pos += n
+            return n
+        with self._lock:
+            if self._writing():
+                raise ValueError("Can't read from the ZIP file while there "
+                        "is an open writing handle on it. "
+                        "Close the writing handle before trying to read.")
+            self._file.seek(self._pos)
+            readinto = getattr(self._file, 'readinto', None)
+            if readinto is not None:
+                n = readinto(b)
+            else:
+                data = self._file.read(len(b))
+                n = len(data)
+                b[:n] = data
+            self._pos = self._file.tell()
+            return n
+
+    def close(self):
+        if self._file is not None:
+            fileobj = self._file
+            self._file = None
+            self._close(fileobj)
+
+
+# CHEVAH-FIX
+class _BufferFile:
+    """Read-only file-like object over a memory mapping or any object
+    supporting the buffer protocol.
+
+    read() returns bytes, for the code parsing the archive records.
+    Members are read through _SharedBuffer, without copying.
+    """
+
+    def __init__(self, buffer, mapping=None):
+        self._view = memoryview(buffer).toreadonly().cast('B')
+        self._mapping = mapping
+        self._pos = 0
+        # os.stat_result of the mapped file, when read from a path.
+        self.stat = None
+
+    @classmethod
+    def from_path(cls, path):
+        import mmap
+        with io.open(path, 'rb') as fp:
+            st = os.fstat(fp.fileno())
+            try:
+                mapping = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped.
+                raise BadZipFile("File is not a zip file") from None
+        self = cls(mapping, mapping)
+        self.stat = st
+        return self
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise OSError("Negative seek position %d" % (offset,))
+        self._pos = offset
+        return self._pos
+
+    def read(self, n=-1):
+        return bytes(self.readview(n))
+
+    def readview(self, n=-1):
+        pos = min(self._pos, len(self._view))
+        if n is None or n < 0:
+            end = len(self._view)
+        else:
+            end = min(pos + n, len(self._view))
+        self._pos = end
+        return self._view[pos:end]
+
+    def close(self):
+        self._view.release()
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                # Views returned by ZipFile.getbuffer() are still in use.
+                # The mapping is closed once they are garbage collected.
+                pass
+            self._mapping = None
+
+
+# CHEVAH-FIX
+class _SharedBuffer:
+    """Per-member reader over a _BufferFile.
+
+    Each instance has its own position and reads return memoryview slices
+    of the archive buffer, so there is no lock, seek or copy involved.
+    """
+
+    def __init__(self, file, pos, close):
+        self._file = file
+        self._view = file._view
+        self._pos = pos
+        self._close = close
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise OSError("Negative seek position %d" % (offset,))
+        self._pos = offset
+        return self._pos
+
+    def read(self, n=-1):
+        pos = min(self._pos, len(self._view))
+        if n is None or n < 0:
+            end = len(self._view)
+        else:
+            end = min(pos + n, len(self._view))
+        self._pos = end
+        return self._view[pos:end]
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
     def close(self):
         if self._file is not None:
             fileobj = self._file
             self._file = None
             self._close(fileobj)
 
+
+# CHEVAH-FIX
+def _fadvise(fd, offset, length, advice):
+    """Give an access pattern hint for a file range, when supported."""
+    if fd is None or advice is None or length <= 0:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+# CHEVAH-FIX
+class _ReadAheadFile:
+    """Wrapper of the file of a member which reads its next block on a
+    background thread while the current block is consumed.
+
+    Only the background thread uses the wrapped file while it runs.  It is
+    stopped before the wrapped file is repositioned, and started again by
+    the next read.
+    """
+
+    _SEQUENTIAL = getattr(os, 'POSIX_FADV_SEQUENTIAL', None)
+    _WILLNEED = getattr(os, 'POSIX_FADV_WILLNEED', None)
+    _DONTNEED = getattr(os, 'POSIX_FADV_DONTNEED', None)
+
+    def __init__(self, file, end, block_size):
+        self._file = file
+        self._end = end
+        self._block_size = block_size
+        self._pos = file.tell()
+        self._block = b''
+        self._block_start = self._pos
+        self._thread = None
+        self._queue = None
+        self._stopped = None
+        self.seekable = file.seekable
+
+        self._fdesc = None
+        if hasattr(os, 'posix_fadvise'):
+            self._fdesc = getattr(file, '_fd', None)
+            if self._fdesc is None:
+                try:
+                    self._fdesc = file._file.fileno()
+                except (AttributeError, OSError, ValueError):
+                    pass
+        _fadvise(self._fdesc, self._pos, end - self._pos, self._SEQUENTIAL)
+
+    def _start(self):
+        import queue
+        # A single queued block, so one block is read while the caller
+        # consumes the previous one.
+        self._queue = queue.Queue(maxsize=1)
+        self._stopped = threading.Event()
+        self._file.seek(self._pos)
+        self._thread = threading.Thread(
+            target=self._run, args=(self._pos, self._queue, self._stopped),
+            name='zipfile-readahead', daemon=True)
+        self._thread.start()
+
+    def _run(self, pos, blocks, stopped):
+        import queue
+        try:
+            while pos < self._end and not stopped.is_set():
+                n = min(self._block_size, self._end - pos)
+                # Ask the kernel for the block after this one.
+                _fadvise(self._fdesc, pos + n,
+                         min(self._block_size, self._end - pos - n),
+                         self._WILLNEED)
+                item = self._file.read(n)
+                if not item:
+                    break
+                pos += len(item)
+                while not stopped.is_set():
+                    try:
+                        blocks.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+            item = b''
+        except BaseException as e:
+            item = e
+        while not stopped.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+    def stop(self):
+        """Stop the background thread, dropping the blocks read ahead."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+
+    def _next_block(self):
+        if self._thread is None:
+            self._start()
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            self.stop()
+            raise item
+        if not item:
+            self.stop()
+        _fadvise(self._fdesc, self._block_start, len(self._block),
+                 self._DONTNEED)
+        self._block = item
+        self._block_start = self._pos
+        return item
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            self.stop()
+            offset = self._file.seek(offset, whence)
+        if not (self._block_start <= offset <=
+                self._block_start + len(self._block)):
+            self.stop()
+            if offset < 0:
+                raise OSError("Negative seek position %d" % (offset,))
+            self._block = b''
+            self._block_start = offset
+        self._pos = offset
+        return self._pos
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = max(self._end - self._pos, 0)
+        chunks = []
+        while n > 0:
+            offset = self._pos - self._block_start
+            if offset >= len(self._block):
+                if self._pos >= self._end or not self._next_block():
+                    break
+                offset = 0
+            data = self._block[offset:offset + n]
+            chunks.append(data)
+            self._pos += len(data)
+            n -= len(data)
+        if len(chunks) == 1:
+            return chunks[0]
+        return b''.join(chunks)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.stop()
+        self._file.close()
+
+
+# CHEVAH-FIX
+def _write_all(out, data):
+    """Write all of data to out, a socket, file descriptor or file."""
+    if isinstance(out, int):
+        with memoryview(data) as view:
+            while view:
+                view = view[os.write(out, view):]
+    elif hasattr(out, 'sendall'):
+        out.sendall(data)
+    else:
+        out.write(data)
+
+
+# CHEVAH-FIX
+class _RawMemberFile(io.RawIOBase):
+    """Read-only file of the compressed data of a member, between prefix
+    and suffix bytes.  Is returned by ZipFile.open_raw() and
+    ZipFile.open_gzip().
+    """
+
+    def __init__(self, fileobj, size, prefix, suffix, name):
+        self._fileobj = fileobj
+        self._start = fileobj.tell()
+        self._size = size
+        self._prefix = prefix
+        self._suffix = suffix
+        self._length = len(prefix) + size + len(suffix)
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        if self.closed:
+            raise ValueError("tell on closed file.")
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if self.closed:
+            raise ValueError("seek on closed file.")
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._length
+        elif whence != os.SEEK_SET:
+            raise ValueError("whence must be os.SEEK_SET (0), "
+                             "os.SEEK_CUR (1), or os.SEEK_END (2)")
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def readinto(self, b):
+        if self.closed:
+            raise ValueError("read from closed file.")
+        data_start = len(self._prefix)
+        data_end = data_start + self._size
+        with memoryview(b) as raw, raw.cast('B') as view:
+            size = 0
+            while size < len(view) and self._pos < self._length:
+                pos = self._pos
+                free = view[size:]
+                if pos < data_start:
+                    n = min(len(free), data_start - pos)
+                    free[:n] = self._prefix[pos:pos + n]
+                elif pos < data_end:
+                    self._fileobj.seek(self._start + pos - data_start)
+                    n = self._fileobj.readinto(
+                        free[:min(len(free), data_end - pos)])
+                    if not n:
+                        raise EOFError
+                else:
+                    n = min(len(free), self._length - pos)
+                    free[:n] = self._suffix[pos - data_end:pos - data_end + n]
+                self._pos += n
+                size += n
+            return size
+
+    def close(self):
+        try:
+            if not self.closed:
+                self._fileobj.close()
+        finally:
+            super().close()
+
+
+# CHEVAH-FIX
+class _FileBackend:
+    """Range reads from a seekable file object, for BlockCacheFile."""
+
+    def __init__(self, file):
+        self._file = file
+        self._lock = threading.Lock()
+        self.name = getattr(file, 'name', None)
+        with self._lock:
+            self.size = file.seek(0, os.SEEK_END)
+
+    def read_range(self, offset, size):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+# CHEVAH-FIX
+class HTTPRangeBackend:
+    """Range reads from a URL over a persistent HTTP connection, for
+    BlockCacheFile.  The server has to support range requests."""
+
+    def __init__(self, url, headers=None, timeout=None):
+        import urllib.parse
+        self.name = url
+        self._url = urllib.parse.urlsplit(url)
+        if self._url.scheme not in ('http', 'https'):
+            raise ValueError("Unsupported URL scheme %r" % self._url.scheme)
+        self._target = self._url.path or '/'
+        if self._url.query:
+            self._target += '?' + self._url.query
+        self._headers = dict(headers or {})
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._connection = None
+        response, _ = self._request('HEAD', {})
+        if response.status != 200:
+            raise OSError("HTTP error %d for %s" % (response.status, url))
+        length = response.getheader('Content-Length')
+        if length is None:
+            raise OSError("No Content-Length for %s" % url)
+        self.size = int(length)
+
+    def _request(self, method, headers):
+        import http.client
+        with self._lock:
+            for retry in (True, False):
+                if self._connection is None:
+                    if self._url.scheme == 'https':
+                        connection_class = http.client.HTTPSConnection
+                    else:
+                        connection_class = http.client.HTTPConnection
+                    self._connection = connection_class(
+                        self._url.netloc, timeout=self._timeout)
+                try:
+                    self._connection.request(
+                        method, self._target,
+                        headers={**self._headers, **headers})
+                    response = self._connection.getresponse()
+                    return response, response.read()
+                except (http.client.HTTPException, OSError):
+                    # The server may have closed the kept alive connection.
+                    self._connection.close()
+                    self._connection = None
+                    if not retry:
+                        raise
+
+    def read_range(self, offset, size):
+        if size <= 0 or offset >= self.size:
+            return b''
+        end = min(offset + size, self.size) - 1
+        response, data = self._request(
+            'GET', {'Range': 'bytes=%d-%d' % (offset, end)})
+        if response.status != 206:
+            raise OSError("HTTP error %d for range request to %s"
+                          % (response.status, self.name))
+        return data
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# CHEVAH-FIX
+class BlockCacheFile(io.RawIOBase):
+    """Read-only file caching fixed size, aligned blocks of a slow source.
+
+    backend is either a seekable file object or an object with a size
+    attribute and a read_range(offset, size) method, like
+    HTTPRangeBackend.  Reads are served from a LRU cache of up to
+    max_blocks blocks of block_size bytes.  The missing blocks of a read
+    are fetched with a single range read, so opening an archive and
+    reading a member take a few requests to the backend.  requests
+    counts them.
+    """
+
+    def __init__(self, backend, block_size=1 << 16, max_blocks=256):
+        if block_size <= 0 or max_blocks <= 0:
+            raise ValueError("block_size and max_blocks must be positive")
+        if not hasattr(backend, 'read_range'):
+            backend = _FileBackend(backend)
+        self._backend = backend
+        self.name = getattr(backend, 'name', None)
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self._size = backend.size
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._pos = 0
+        self.requests = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        elif whence != os.SEEK_SET:
+            raise ValueError("whence must be os.SEEK_SET (0), "
+                             "os.SEEK_CUR (1), or os.SEEK_END (2)")
+        if offset < 0:
+            raise OSError("Negative seek position %d" % (offset,))
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, b):
+        if self.closed:
+            raise ValueError("read from closed file.")
+        with memoryview(b) as raw, raw.cast('B') as view:
+            start = min(self._pos, self._size)
+            end = min(start + len(view), self._size)
+            if end <= start:
+                return 0
+            size = self.block_size
+            first = start // size
+            blocks = self._get_blocks(first, (end - 1) // size + 1)
+            pos = 0
+            skip = start - first * size
+            for block in blocks:
+                part = block[skip:skip + end - start - pos]
+                view[pos:pos + len(part)] = part
+                pos += len(part)
+                skip = 0
+            self._pos = start + pos
+            return pos
+
+    def _get_blocks(self, first, stop):
+        """Return the blocks from first to stop, reading the missing ones
+        in runs of neighbouring blocks."""
+        with self._lock:
+            found = {}
+            for index in range(first, stop):
+                block = self._blocks.get(index)
+                if block is not None:
+                    self._blocks.move_to_end(index)
+                    found[index] = block
+        index = first
+        while index < stop:
+            if index in found:
+                index += 1
+                continue
+            run = index
+            while index < stop and index not in found:
+                index += 1
+            offset = run * self.block_size
+            data = self._backend.read_range(
+                offset, (index - run) * self.block_size)
+            with self._lock:
+                self.requests += 1
+            # A short block would shift the bytes of the next ones.
+            expected = min(index * self.block_size, self._size) - offset
+            if len(data) != expected:
+                raise OSError("Short read from %s: got %d bytes of %d at "
+                              "offset %d" % (self.name, len(data), expected,
+                                             offset))
+            for i in range(run, index):
+                offset = (i - run) * self.block_size
+                found[i] = data[offset:offset + self.block_size]
+        with self._lock:
+            for index in range(max(first, stop - self.max_blocks), stop):
+                self._blocks[index] = found[index]
+                self._blocks.move_to_end(index)
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return [found[index] for index in range(first, stop)]
+
+    def close(self):
+        if not self.closed:
+            self._blocks.clear()
+            if hasattr(self._backend, 'close'):
+                self._backend.close()
+        super().close()
+
+
 # Provide the tell method for unseekable stream
 class _Tellable:
     def __init__(self, fp):
@@ -970,6 +1683,35 @@ class ZipExtFile(io.BufferedIOBase):
     # Chunk size to read during seek
     MAX_SEEK_READ = 1 << 24
 
+    # CHEVAH-FIX
+    # Default distance between seek checkpoints, in decompressed bytes.
+    CHECKPOINT_SPAN = 1 << 24
+
+    # CHEVAH-FIX
+    # Max compressed bytes read at once by read() when reading up to the
+    # end of the member.
+    READALL_CHUNK_SIZE = 1 << 20
+
+    # CHEVAH-FIX
+    # Max compressed bytes read at once while recording checkpoints, which
+    # bounds the unconsumed input kept by each checkpoint.
+    MAX_CHECKPOINT_READ = 1 << 16
+
+    # CHEVAH-FIX
+    # Decompressed bytes searched at once by readline() and iter_lines().
+    LINE_CHUNK_SIZE = 1 << 16
+
+    # CHEVAH-FIX
+    # Compressed bytes fetched at once by the read-ahead thread.
+    READAHEAD_BLOCK_SIZE = 1 << 20
+
+    # CHEVAH-FIX
+    # Set here since close() checks them, also when __init__ failed.
+    # Seek checkpoints, see enable_checkpoints().
+    _checkpoints = None
+    # Read-ahead wrapper of fileobj, see enable_readahead().
+    _readahead = None
+
     def __init__(self, fileobj, mode, zipinfo, pwd=None,
                  close_fileobj=False):
         self._fileobj = fileobj
@@ -986,6 +1728,10 @@ class ZipExtFile(io.BufferedIOBase):
         self._readbuffer = b''
         self._offset = 0
 
+        # CHEVAH-FIX
+        self._checkpoint_span = None
+        self._next_checkpoint = None
+
         self.newlines = None
 
         self.mode = mode
@@ -1053,6 +1799,9 @@ class ZipExtFile(io.BufferedIOBase):
         If limit is specified, at most limit bytes will be read.
         """
 
+        # CHEVAH-FIX
+        if limit is None:
+            limit = -1
         if limit < 0:
             # Shortcut common case - newline found in buffer.
             i = self._readbuffer.find(b'\n', self._offset) + 1
@@ -1061,7 +1810,83 @@ class ZipExtFile(io.BufferedIOBase):
                 self._offset = i
                 return line
 
-        return io.BufferedIOBase.readline(self, limit)
+        # CHEVAH-FIX
+        # Search whole decompressed chunks, instead of the peek() and read()
+        # calls of io.BufferedIOBase.readline().
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        chunks = []
+        while limit:
+            buf = self._readbuffer
+            start = self._offset
+            end = len(buf) if limit < 0 else min(len(buf), start + limit)
+            i = buf.find(b'\n', start, end) + 1
+            if i > 0:
+                end = i
+            if end > start:
+                chunks.append(buf[start:end])
+                if limit > 0:
+                    limit -= end - start
+            self._offset = end
+            if i > 0:
+                break
+            if end == len(buf):
+                if self._eof:
+                    break
+                self._readbuffer = self._read1(self.LINE_CHUNK_SIZE)
+                self._offset = 0
+        if len(chunks) == 1:
+            return chunks[0]
+        return b''.join(chunks)
+
+    # CHEVAH-FIX
+    def iter_lines(self, encoding=None, errors='strict', chunk_size=None):
+        """Iterate over the lines of the member, from the current position.
+
+        Lines end with b'\\n' and keep it, like when iterating the file.
+        With encoding, the data is decoded and str lines ending with '\\n'
+        are returned instead, without newline translation.
+
+        Data is decompressed in chunks of chunk_size bytes and each chunk
+        is split at once, which is much faster than calling readline().
+        The position of the file is undefined until the iteration ends.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if chunk_size is None:
+            chunk_size = self.LINE_CHUNK_SIZE
+        if encoding is None:
+            decode = None
+            newline = b'\n'
+            split = io.BytesIO
+        else:
+            decode = codecs.getincrementaldecoder(encoding)(errors).decode
+            newline = '\n'
+            split = lambda block: io.StringIO(block, newline='\n')
+        join = newline[:0].join
+        # Parts of the line in progress, joined once its end is found.
+        pending = [self._readbuffer[self._offset:]]
+        self._readbuffer = b''
+        self._offset = 0
+        if decode is not None:
+            pending = [decode(pending[0], self._eof)]
+        while True:
+            chunk = self._read1(chunk_size)
+            if decode is not None:
+                chunk = decode(chunk, self._eof)
+            if self._eof:
+                pending.append(chunk)
+                block = join(pending)
+                if block:
+                    yield from split(block)
+                return
+            i = chunk.rfind(newline) + 1
+            if i:
+                pending.append(chunk[:i])
+                yield from split(join(pending))
+                pending = [chunk[i:]]
+            else:
+                pending.append(chunk)
 
     def peek(self, n=1):
         """Returns buffered bytes without advancing the position."""
@@ -1087,13 +1912,9 @@ class ZipExtFile(io.BufferedIOBase):
         """
         if self.closed:
             raise ValueError("read from closed file.")
+        # CHEVAH-FIX
         if n is None or n < 0:
-            buf = self._readbuffer[self._offset:]
-            self._readbuffer = b''
-            self._offset = 0
-            while not self._eof:
-                buf += self._read1(self.MAX_N)
-            return buf
+            return self._readall()
 
         end = n + self._offset
         if end < len(self._readbuffer):
@@ -1102,7 +1923,7 @@ class ZipExtFile(io.BufferedIOBase):
             return buf
 
         n = end - len(self._readbuffer)
-        buf = self._readbuffer[self._offset:]
+        chunks = [self._readbuffer[self._offset:]]
         self._readbuffer = b''
         self._offset = 0
         while n > 0 and not self._eof:
@@ -1110,16 +1931,111 @@ class ZipExtFile(io.BufferedIOBase):
             if n < len(data):
                 self._readbuffer = data
                 self._offset = n
-                buf += data[:n]
+                chunks.append(data[:n])
                 break
-            buf += data
+            chunks.append(data)
             n -= len(data)
-        return buf
+        return b''.join(chunks)
 
-    def _update_crc(self, newdata):
-        # Update the CRC using the given data.
-        if self._expected_crc is None:
-            # No need to compute the CRC if we don't have a reference value
+    # CHEVAH-FIX
+    def _readall(self):
+        # The size of the member is known from the central directory, so
+        # the result is allocated once and filled with bounded chunks.
+        # io.BytesIO.getvalue() returns its buffer without a copy when it
+        # has the exact size, so the peak memory stays close to the size
+        # of the member.
+        buffered = self._readbuffer[self._offset:]
+        self._readbuffer = b''
+        self._offset = 0
+        size = len(buffered) + max(self._left, 0)
+        # Don't trust a size which the member data can't reach, a larger
+        # result grows as it is written.
+        if self._compress_type == ZIP_STORED:
+            size = min(size, len(buffered) + max(self._compress_left, 0))
+        else:
+            # Not even deflate expands its input more than 1032 times.
+            size = min(size, len(buffered) + (self._compress_left + 1) * 1032)
+        result = io.BytesIO()
+        if size > 1:
+            result.seek(size - 1)
+            result.write(b'\0')
+            result.seek(0)
+        result.write(buffered)
+        while not self._eof:
+            result.write(self._read1(self.READALL_CHUNK_SIZE))
+        result.truncate()
+        return result.getvalue()
+
+    # CHEVAH-FIX
+    def readinto(self, b):
+        """Read bytes into the pre-allocated writable bytes-like object b.
+
+        Return the number of bytes read, 0 at the end of the member.
+        """
+        return self._readinto(b, False)
+
+    # CHEVAH-FIX
+    def readinto1(self, b):
+        """Read bytes into b, with at most one read() system call."""
+        return self._readinto(b, True)
+
+    # CHEVAH-FIX
+    def _readinto(self, b, once):
+        if self.closed:
+            raise ValueError("read from closed file.")
+        with memoryview(b) as raw, raw.cast('B') as view:
+            size = len(view)
+            pos = 0
+            buffered = len(self._readbuffer) - self._offset
+            if buffered:
+                pos = min(buffered, size)
+                view[:pos] = self._readbuffer[self._offset:self._offset + pos]
+                self._offset += pos
+                if self._offset == len(self._readbuffer):
+                    self._readbuffer = b''
+                    self._offset = 0
+                if once:
+                    return pos
+            while pos < size and not self._eof:
+                if (self._compress_type == ZIP_STORED and
+                        self._decrypter is None and
+                        hasattr(self._fileobj, 'readinto')):
+                    # Read straight into the caller buffer.
+                    n = self._read2_into(view[pos:])
+                else:
+                    data = self._read1(size - pos)
+                    n = min(len(data), size - pos)
+                    view[pos:pos + n] = memoryview(data)[:n]
+                    if n < len(data):
+                        self._readbuffer = data
+                        self._offset = n
+                pos += n
+                if once and n:
+                    break
+            return pos
+
+    # CHEVAH-FIX
+    def _read2_into(self, view):
+        # Read stored data into view, the readinto() version of _read1().
+        n = min(len(view), self._compress_left, self._left)
+        if n <= 0:
+            self._eof = True
+            self._update_crc(b'')
+            return 0
+        view = view[:n]
+        n = self._fileobj.readinto(view)
+        if not n:
+            raise EOFError
+        self._compress_left -= n
+        self._left -= n
+        self._eof = self._compress_left <= 0 or self._left <= 0
+        self._update_crc(view[:n])
+        return n
+
+    def _update_crc(self, newdata):
+        # Update the CRC using the given data.
+        if self._expected_crc is None:
+            # No need to compute the CRC if we don't have a reference value
             return
         self._running_crc = crc32(newdata, self._running_crc)
         # Check the CRC if we're at the end of the file
@@ -1136,7 +2052,8 @@ class ZipExtFile(io.BufferedIOBase):
             while not self._eof:
                 data = self._read1(self.MAX_N)
                 if data:
-                    buf += data
+                    # CHEVAH-FIX
+                    buf = buf + data if buf else data
                     break
             return buf
 
@@ -1156,10 +2073,11 @@ class ZipExtFile(io.BufferedIOBase):
                 if n < len(data):
                     self._readbuffer = data
                     self._offset = n
-                    buf += data[:n]
+                    # CHEVAH-FIX
+                    buf = buf + data[:n] if buf else data[:n]
                     break
                 if data:
-                    buf += data
+                    buf = buf + data if buf else data
                     break
         return buf
 
@@ -1174,12 +2092,24 @@ class ZipExtFile(io.BufferedIOBase):
             ## Handle unconsumed data.
             data = self._decompressor.unconsumed_tail
             if n > len(data):
-                data += self._read2(n - len(data))
+                # CHEVAH-FIX
+                # Don't copy a buffer slice when there is nothing to prepend.
+                size = n - len(data)
+                if self._checkpoints is not None:
+                    size = min(size, self.MAX_CHECKPOINT_READ)
+                if data:
+                    data += self._read2(size)
+                else:
+                    data = self._read2(size)
         else:
             data = self._read2(n)
 
         if self._compress_type == ZIP_STORED:
             self._eof = self._compress_left <= 0
+            # CHEVAH-FIX
+            # Buffer backed archives return memoryview slices.
+            if not isinstance(data, bytes):
+                data = bytes(data[:self._left])
         elif self._compress_type == ZIP_DEFLATED:
             n = max(n, self.MIN_READ_SIZE)
             data = self._decompressor.decompress(data, n)
@@ -1197,8 +2127,115 @@ class ZipExtFile(io.BufferedIOBase):
         if self._left <= 0:
             self._eof = True
         self._update_crc(data)
+        # CHEVAH-FIX
+        if (self._checkpoints is not None and not self._eof and
+                self._orig_file_size - self._left >= self._next_checkpoint):
+            self._add_checkpoint()
         return data
 
+    # CHEVAH-FIX
+    def enable_checkpoints(self, span=None, build=False):
+        """Record seek checkpoints every span bytes of decompressed data.
+
+        A checkpoint holds a copy of the decompressor state, including its
+        32 KiB window, so seek() only has to decompress from the closest
+        checkpoint before the target instead of from the start of the
+        member.  Checkpoints are recorded while the member is read.  If
+        build is True, the whole member is read now to record them.
+
+        Only deflated members which are not encrypted are supported.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if not self._seekable:
+            raise io.UnsupportedOperation("underlying stream is not seekable")
+        if self._compress_type != ZIP_DEFLATED or self._decrypter is not None:
+            raise io.UnsupportedOperation(
+                "checkpoints are only supported for unencrypted "
+                "deflated members")
+        if span is None:
+            span = self.CHECKPOINT_SPAN
+        if span <= 0:
+            raise ValueError("span must be positive")
+        if self._checkpoints is None:
+            self._checkpoints = []
+        self._checkpoint_span = span
+        frontier = self._orig_file_size - self._left
+        if self._checkpoints:
+            frontier = max(frontier, self._checkpoints[-1][0])
+        self._next_checkpoint = frontier + span
+        if build:
+            pos = self.tell()
+            self.seek(0)
+            while self.read(self.MAX_SEEK_READ):
+                pass
+            self.seek(pos)
+
+    # CHEVAH-FIX
+    def enable_readahead(self, block_size=None):
+        """Read the compressed data of the member on a background thread.
+
+        The thread reads the next block of block_size bytes while the
+        current one is decompressed, so sequential reads of large members
+        overlap disk I/O and decompression.  When supported, the kernel is
+        told the member is read sequentially and consumed blocks are
+        dropped from the page cache.
+
+        This does nothing for archives read from a buffer or with
+        use_mmap, which have no I/O to overlap.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if block_size is None:
+            block_size = self.READAHEAD_BLOCK_SIZE
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if self._readahead is not None:
+            self._readahead._block_size = block_size
+            return
+        if isinstance(self._fileobj, _SharedBuffer):
+            return
+        self._readahead = _ReadAheadFile(
+            self._fileobj, self._fileobj.tell() + self._compress_left,
+            block_size)
+        self._fileobj = self._readahead
+
+    # CHEVAH-FIX
+    def _add_checkpoint(self):
+        pos = self._orig_file_size - self._left
+        if not self._checkpoints or pos > self._checkpoints[-1][0]:
+            self._checkpoints.append((
+                pos, self._fileobj.tell(), self._compress_left,
+                self._decompressor.copy(), self._running_crc))
+        self._next_checkpoint = pos + self._checkpoint_span
+
+    # CHEVAH-FIX
+    def _restore_checkpoint(self, new_pos, curr_pos):
+        """Restore the closest checkpoint before new_pos, if that is
+        better than decompressing from curr_pos.
+
+        Return True if a checkpoint was restored."""
+        i = bisect.bisect_right(self._checkpoints, new_pos,
+                                key=lambda checkpoint: checkpoint[0])
+        if not i:
+            return False
+        pos, file_pos, compress_left, decompressor, crc = self._checkpoints[i - 1]
+        if curr_pos <= new_pos and pos <= curr_pos:
+            return False
+        self._fileobj.seek(file_pos)
+        self._compress_left = compress_left
+        self._left = self._orig_file_size - pos
+        self._decompressor = decompressor.copy()
+        # The state is the one of a sequential read, so the CRC still holds.
+        self._running_crc = crc
+        self._expected_crc = self._orig_crc
+        self._readbuffer = b''
+        self._offset = 0
+        self._eof = False
+        self._next_checkpoint = (
+            self._checkpoints[-1][0] + self._checkpoint_span)
+        return True
+
     def _read2(self, n):
         if self._compress_left <= 0:
             return b''
@@ -1217,6 +2254,9 @@ class ZipExtFile(io.BufferedIOBase):
 
     def close(self):
         try:
+            # CHEVAH-FIX
+            if self._readahead is not None:
+                self._readahead.stop()
             if self._close_fileobj:
                 self._fileobj.close()
         finally:
@@ -1270,6 +2310,9 @@ class ZipExtFile(io.BufferedIOBase):
             # flush read buffer
             self._readbuffer = b''
             self._offset = 0
+        # CHEVAH-FIX
+        elif self._checkpoints and self._restore_checkpoint(new_pos, curr_pos):
+            read_offset = new_pos - (self._orig_file_size - self._left)
         elif read_offset < 0:
             # Position is before the current position. Reset the ZipExtFile
             self._fileobj.seek(self._orig_compress_start)
@@ -1302,12 +2345,17 @@ class ZipExtFile(io.BufferedIOBase):
 
 
 class _ZipWriteFile(io.BufferedIOBase):
-    def __init__(self, zf, zinfo, zip64):
+    def __init__(self, zf, zinfo, zip64, max_workers=None):
         self._zinfo = zinfo
         self._zip64 = zip64
         self._zipfile = zf
-        self._compressor = _get_compressor(zinfo.compress_type,
-                                           zinfo.compress_level)
+        # CHEVAH-FIX
+        if max_workers and zinfo.compress_type == ZIP_DEFLATED:
+            self._compressor = _ParallelDeflater(zinfo.compress_level,
+                                                 max_workers)
+        else:
+            self._compressor = _get_compressor(zinfo.compress_type,
+                                               zinfo.compress_level)
         self._file_size = 0
         self._compress_size = 0
         self._crc = 0
@@ -1339,7 +2387,10 @@ class _ZipWriteFile(io.BufferedIOBase):
             nbytes = data.nbytes
         self._file_size += nbytes
 
-        self._crc = crc32(data, self._crc)
+        # CHEVAH-FIX
+        # The parallel deflater computes the CRC of its blocks.
+        if not isinstance(self._compressor, _ParallelDeflater):
+            self._crc = crc32(data, self._crc)
         if self._compressor:
             data = self._compressor.compress(data)
             self._compress_size += len(data)
@@ -1357,6 +2408,9 @@ class _ZipWriteFile(io.BufferedIOBase):
                 self._compress_size += len(buf)
                 self._fileobj.write(buf)
                 self._zinfo.compress_size = self._compress_size
+                # CHEVAH-FIX
+                if isinstance(self._compressor, _ParallelDeflater):
+                    self._crc = self._compressor.crc
             else:
                 self._zinfo.compress_size = self._file_size
             self._zinfo.CRC = self._crc
@@ -1392,6 +2446,707 @@ class _ZipWriteFile(io.BufferedIOBase):
             self._zipfile._writing = False
 
 
+# CHEVAH-FIX
+# CRC-32 combination, as crc32_combine() of zlib: the CRC of A + B is
+# the CRC of A multiplied by x^(8 * len(B)) modulo the CRC polynomial,
+# xor the CRC of B.  Polynomials are bit reversed, as in the CRC.
+def _multmodp(a, b):
+    """Return a(x) * b(x) modulo the CRC-32 polynomial."""
+    m = 1 << 31
+    p = 0
+    while True:
+        if a & m:
+            p ^= b
+            if not a & (m - 1):
+                break
+        m >>= 1
+        b = (b >> 1) ^ 0xEDB88320 if b & 1 else b >> 1
+    return p
+
+
+_x2ntable = None
+
+def _x2nmodp(n, k):
+    """Return x^(n * 2^k) modulo the CRC-32 polynomial."""
+    global _x2ntable
+    if _x2ntable is None:
+        # x^(2^k) for k in 0..31.
+        table = [1 << 30]
+        for i in range(31):
+            table.append(_multmodp(table[-1], table[-1]))
+        _x2ntable = table
+    p = 1 << 31
+    while n:
+        if n & 1:
+            p = _multmodp(_x2ntable[k & 31], p)
+        n >>= 1
+        k += 1
+    return p
+
+
+def _crc32_combine(crc1, crc2, len2):
+    """Return the CRC-32 of A + B from the CRC-32 crc1 of A, and crc2 of
+    B of len2 bytes."""
+    return _multmodp(_x2nmodp(len2, 3), crc1) ^ crc2
+
+
+# CHEVAH-FIX
+def _deflate_block(data, zdict, level, last):
+    """Return the raw deflate stream of data, primed with the dictionary
+    zdict and ended with a sync flush unless last, and its CRC-32."""
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = memoryview(data)
+    return (compressor.compress(data) +
+            compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH),
+            crc32(data))
+
+
+# CHEVAH-FIX
+class _ParallelDeflater:
+    """Deflate compressor spreading the work on a pool of threads, as
+    pigz does.
+
+    The data is split in blocks of block_size bytes, each compressed on
+    its own with the last 32 KiB of the previous block as dictionary,
+    and ended by a sync flush, so their streams concatenate into one
+    valid deflate stream.  The CRC of the data is combined from the CRC
+    of the blocks and is available as crc after flush().
+    """
+
+    block_size = 1 << 20
+
+    def __init__(self, level, max_workers):
+        from concurrent.futures import ThreadPoolExecutor
+        if level is None:
+            level = zlib.Z_DEFAULT_COMPRESSION
+        self._level = level
+        self._executor = ThreadPoolExecutor(max_workers)
+        # Blocks compressed or being compressed, at most two per worker.
+        self._max_pending = 2 * max_workers
+        self._pending = collections.deque()
+        self._buffer = bytearray()
+        self._zdict = b''
+        self.crc = 0
+
+    def _submit(self, block, last):
+        self._pending.append((
+            self._executor.submit(
+                _deflate_block, block, self._zdict, self._level, last),
+            len(block)))
+        self._zdict = block[-32768:]
+
+    def _collect(self):
+        future, length = self._pending.popleft()
+        data, crc = future.result()
+        self.crc = _crc32_combine(self.crc, crc, length)
+        return data
+
+    def compress(self, data):
+        self._buffer += data
+        block_size = self.block_size
+        output = []
+        while len(self._buffer) >= block_size:
+            self._submit(bytes(self._buffer[:block_size]), False)
+            del self._buffer[:block_size]
+            if len(self._pending) > self._max_pending:
+                output.append(self._collect())
+        while self._pending and self._pending[0][0].done():
+            output.append(self._collect())
+        return b''.join(output)
+
+    def flush(self):
+        try:
+            self._submit(bytes(self._buffer), True)
+            self._buffer = bytearray()
+            output = []
+            while self._pending:
+                output.append(self._collect())
+            return b''.join(output)
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+# CHEVAH-FIX
+def _walk_files(filenames):
+    """Yield (path, arcname) for the files and directories to add by
+    ZipFile.write_many(), walking directories in name order."""
+    for item in filenames:
+        if isinstance(item, tuple):
+            path, arcname = item
+        else:
+            path, arcname = item, None
+        path = os.fspath(path)
+        if os.path.isfile(path):
+            yield path, arcname
+        elif os.path.isdir(path):
+            yield from _walk_tree(path, arcname)
+
+
+def _walk_tree(path, arcname):
+    # An empty arcname adds the content of the directory at the top.
+    if arcname != '':
+        yield path, arcname
+    with os.scandir(path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        child = None if arcname is None else os.path.join(arcname, entry.name)
+        if entry.is_dir():
+            yield from _walk_tree(entry.path, child)
+        elif entry.is_file():
+            yield entry.path, child
+
+
+# CHEVAH-FIX
+def _compress_file(filename, compress_type, compresslevel, max_memory):
+    """Compress the file at filename for ZipFile.write_many().
+
+    Return (data, spill_path, CRC, file_size, compress_size), with the
+    compressed bytes in data or, once they grow over max_memory bytes,
+    in the temporary file spill_path.  Runs in worker threads or
+    processes.
+    """
+    compressor = _get_compressor(compress_type, compresslevel)
+    parts = []
+    spill = spill_path = None
+    crc = file_size = compress_size = 0
+    try:
+        with open(filename, 'rb') as src:
+            while True:
+                data = src.read(1 << 20)
+                if data:
+                    file_size += len(data)
+                    crc = crc32(data, crc)
+                    if compressor is not None:
+                        data = compressor.compress(data)
+                elif compressor is not None:
+                    data = compressor.flush()
+                    compressor = None
+                else:
+                    break
+                parts.append(data)
+                compress_size += len(data)
+                if spill is None and compress_size > max_memory:
+                    import tempfile
+                    fd, spill_path = tempfile.mkstemp(prefix='zipfile-')
+                    spill = open(fd, 'wb')
+                if spill is not None:
+                    spill.writelines(parts)
+                    parts.clear()
+        if spill is not None:
+            spill.close()
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.remove(spill_path)
+        raise
+    return b''.join(parts), spill_path, crc, file_size, compress_size
+
+
+
+# CHEVAH-FIX
+_CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+# CHEVAH-FIX
+class _MemberCache:
+    """Thread safe LRU cache of member bytes, bounded by their total size."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._data.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        size = len(data)
+        if size > self.maxsize:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._data[key] = data
+            self._size += size
+            while self._size > self.maxsize:
+                _, old = self._data.popitem(last=False)
+                self._size -= len(old)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def info(self):
+        with self._lock:
+            return _CacheInfo(self._hits, self._misses, self._evictions,
+                              self.maxsize, self._size)
+
+
+# CHEVAH-FIX
+def _make_zipinfo(zipinfo_class, centdir, filename, extra, comment, concat,
+                  metadata_encoding):
+    """Return the ZipInfo for a central directory record."""
+    orig_filename_crc = crc32(filename)
+    flags = centdir[_CD_FLAG_BITS]
+    if flags & _MASK_UTF_FILENAME:
+        # UTF-8 file names extension
+        filename = filename.decode('utf-8')
+    else:
+        # Historical ZIP filename encoding
+        filename = filename.decode(metadata_encoding or 'cp437')
+    # Create ZipInfo instance to store file information
+    x = zipinfo_class(filename)
+    x.extra = extra
+    x.comment = comment
+    x.header_offset = centdir[_CD_LOCAL_HEADER_OFFSET]
+    (x.create_version, x.create_system, x.extract_version, x.reserved,
+     x.flag_bits, x.compress_type, t, d,
+     x.CRC, x.compress_size, x.file_size) = centdir[1:12]
+    if x.extract_version > MAX_EXTRACT_VERSION:
+        raise NotImplementedError("zip file version %.1f" %
+                                  (x.extract_version / 10))
+    x.volume, x.internal_attr, x.external_attr = centdir[15:18]
+    # Convert date/time code to (year, month, day, hour, min, sec)
+    x._raw_time = t
+    x.date_time = ( (d>>9)+1980, (d>>5)&0xF, d&0x1F,
+                    t>>11, (t>>5)&0x3F, (t&0x1F) * 2 )
+    x._decodeExtra(orig_filename_crc)
+    x.header_offset = x.header_offset + concat
+    return x
+
+
+# CHEVAH-FIX
+class _CentralDirectory:
+    """The central directory of an archive, kept in array columns.
+
+    The raw records are kept in a single bytes object and the fields
+    needed for listing and reading members are unpacked into arrays.
+    ZipInfo instances are created on first access and then cached.
+    """
+
+    _struct = struct.Struct(structCentralDir)
+
+    # The columns, in the order they are saved in the index cache.
+    _columns = (
+        ('records', 'Q'),
+        ('header_offsets', 'Q'),
+        ('end_offsets', 'Q'),
+        ('compress_sizes', 'Q'),
+        ('file_sizes', 'Q'),
+        ('crcs', 'I'),
+        ('flags', 'H'),
+        ('compress_types', 'H'),
+        ('dostimes', 'I'),
+        )
+
+    def __init__(self, data, concat, start_dir, zipinfo_class=ZipInfo,
+                 metadata_encoding=None):
+        self._data = data
+        self._concat = concat
+        self._zipinfo_class = zipinfo_class
+        self._encoding = metadata_encoding
+        # Position of each record in data.
+        self.records = array.array('Q')
+        self.header_offsets = array.array('Q')
+        self.compress_sizes = array.array('Q')
+        self.file_sizes = array.array('Q')
+        self.crcs = array.array('I')
+        self.flags = array.array('H')
+        self.compress_types = array.array('H')
+        # DOS date in the high 16 bits, DOS time in the low 16 bits.
+        self.dostimes = array.array('I')
+        # Start of the next local header, set by _set_end_offsets().
+        self.end_offsets = None
+        # Names which can't be decoded straight from the record, from the
+        # Unicode Path Extra Field or sanitized by _sanitize_filename().
+        self._names = {}
+        self._infos = {}
+        self._sorted = None
+        self._parse()
+        self._set_end_offsets(start_dir)
+
+    def _parse(self):
+        data = self._data
+        unpack_from = self._struct.unpack_from
+        size_cd = len(data)
+        # Names with a separator other than '/' need sanitizing.
+        sep = os.sep.encode('ascii') if os.sep != '/' else None
+        records_append = self.records.append
+        header_offsets_append = self.header_offsets.append
+        compress_sizes_append = self.compress_sizes.append
+        file_sizes_append = self.file_sizes.append
+        crcs_append = self.crcs.append
+        flags_append = self.flags.append
+        compress_types_append = self.compress_types.append
+        dostimes_append = self.dostimes.append
+        pos = 0
+        while pos < size_cd:
+            if size_cd - pos < sizeCentralDir:
+                raise BadZipFile("Truncated central directory")
+            centdir = unpack_from(data, pos)
+            if centdir[_CD_SIGNATURE] != stringCentralDir:
+                raise BadZipFile("Bad magic number for central directory")
+            if centdir[_CD_EXTRACT_VERSION] > MAX_EXTRACT_VERSION:
+                raise NotImplementedError("zip file version %.1f" %
+                                          (centdir[_CD_EXTRACT_VERSION] / 10))
+            name_start = pos + sizeCentralDir
+            extra_start = name_start + centdir[_CD_FILENAME_LENGTH]
+            comment_start = extra_start + centdir[_CD_EXTRA_FIELD_LENGTH]
+            end = comment_start + centdir[_CD_COMMENT_LENGTH]
+
+            header_offset = centdir[_CD_LOCAL_HEADER_OFFSET]
+            compress_size = centdir[_CD_COMPRESSED_SIZE]
+            file_size = centdir[_CD_UNCOMPRESSED_SIZE]
+            if (0xFFFFFFFF in (header_offset, compress_size, file_size) or
+                    data.find(b'up', extra_start, comment_start) >= 0 or
+                    data.find(b'\0', name_start, extra_start) >= 0 or
+                    sep and data.find(sep, name_start, extra_start) >= 0):
+                # ZIP64 sizes, a possible Unicode Path Extra Field or a
+                # name in need of sanitizing: let ZipInfo handle it.
+                x = _make_zipinfo(
+                    self._zipinfo_class, centdir,
+                    data[name_start:extra_start],
+                    data[extra_start:comment_start],
+                    data[comment_start:end],
+                    self._concat, self._encoding)
+                index = len(self.records)
+                self._infos[index] = x
+                header_offset = x.header_offset - self._concat
+                compress_size = x.compress_size
+                file_size = x.file_size
+                if x.filename != x.orig_filename:
+                    self._names[index] = x.filename
+
+            records_append(pos)
+            header_offsets_append(header_offset + self._concat)
+            compress_sizes_append(compress_size)
+            file_sizes_append(file_size)
+            crcs_append(centdir[_CD_CRC])
+            flags_append(centdir[_CD_FLAG_BITS])
+            compress_types_append(centdir[_CD_COMPRESS_TYPE])
+            dostimes_append(centdir[_CD_DATE] << 16 | centdir[_CD_TIME])
+            pos = end
+
+    def _set_end_offsets(self, end_offset):
+        offsets = self.header_offsets
+        self.end_offsets = array.array('Q', bytes(8 * len(offsets)))
+        for i in sorted(range(len(offsets)), key=offsets.__getitem__,
+                        reverse=True):
+            self.end_offsets[i] = end_offset
+            end_offset = offsets[i]
+        for i, x in self._infos.items():
+            x._end_offset = self.end_offsets[i]
+
+    def dump(self, path, key):
+        """Write the columns to the index cache file at path.
+
+        key is the (size, mtime_ns, checksum, encoding) of the archive.
+        Errors are ignored, the cache is only an optimization.
+        """
+        data = self.to_bytes(key)
+        temp_path = '%s.%d.%d.tmp' % (path, os.getpid(),
+                                      threading.get_ident())
+        try:
+            with io.open(temp_path, 'wb') as fp:
+                fp.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def to_bytes(self, key):
+        """Return the columns serialized in the index cache format."""
+        size, mtime_ns, checksum, encoding = key
+        encoding = encoding.encode('ascii')
+        names = []
+        for index, name in sorted(self._names.items()):
+            name = name.encode('utf-8', 'surrogatepass')
+            names.append(struct.pack('<QL', index, len(name)))
+            names.append(name)
+        names = b''.join(names)
+        header = struct.pack(
+            structIndexHeader, stringIndexHeader, _INDEX_VERSION,
+            sys.byteorder == 'little', size, mtime_ns, checksum,
+            len(encoding), self._concat, len(self.records), len(self._data),
+            len(names))
+        parts = [header, encoding, self._data]
+        parts.extend(getattr(self, column).tobytes()
+                     for column, _ in self._columns)
+        parts.append(names)
+        return b''.join(parts)
+
+    @classmethod
+    def load(cls, path, key, zipinfo_class=ZipInfo):
+        """Return the columns from the index cache file at path.
+
+        Return None if the file can't be read or was written for another
+        version of the archive.
+        """
+        try:
+            with io.open(path, 'rb') as fp:
+                data = fp.read()
+        except OSError:
+            return None
+        return cls.from_bytes(data, key, zipinfo_class)
+
+    @classmethod
+    def from_bytes(cls, data, key, zipinfo_class=ZipInfo):
+        """Return the columns serialized by to_bytes(), or None if they
+        are for another version of the archive."""
+        try:
+            (magic, version, little_endian, size, mtime_ns, checksum,
+             encoding_len, concat, count, data_len, names_len
+             ) = struct.unpack_from(structIndexHeader, data)
+            pos = sizeIndexHeader
+            encoding = data[pos:pos + encoding_len].decode('ascii')
+            pos += encoding_len
+            if (magic != stringIndexHeader or version != _INDEX_VERSION or
+                    little_endian != (sys.byteorder == 'little') or
+                    (size, mtime_ns, checksum, encoding) != key):
+                return None
+            central_dir = cls.__new__(cls)
+            central_dir._data = data[pos:pos + data_len]
+            pos += data_len
+            for column, typecode in cls._columns:
+                values = array.array(typecode)
+                end = pos + count * values.itemsize
+                values.frombytes(data[pos:end])
+                setattr(central_dir, column, values)
+                pos = end
+            central_dir._names = {}
+            names = data[pos:pos + names_len]
+            if pos + names_len != len(data):
+                return None
+            pos = 0
+            while pos < names_len:
+                index, length = struct.unpack_from('<QL', names, pos)
+                pos += 12
+                central_dir._names[index] = names[pos:pos + length].decode(
+                    'utf-8', 'surrogatepass')
+                pos += length
+        except (struct.error, ValueError):
+            return None
+        central_dir._concat = concat
+        central_dir._zipinfo_class = zipinfo_class
+        central_dir._encoding = encoding or None
+        central_dir._infos = {}
+        central_dir._sorted = None
+        return central_dir
+
+    def __len__(self):
+        return len(self.records)
+
+    def name(self, index):
+        """Return the file name of the record at index."""
+        name = self._names.get(index)
+        if name is not None:
+            return name
+        pos = self.records[index]
+        start = pos + sizeCentralDir
+        end = start + self._struct.unpack_from(
+            self._data, pos)[_CD_FILENAME_LENGTH]
+        if self.flags[index] & _MASK_UTF_FILENAME:
+            return self._data[start:end].decode('utf-8')
+        return self._data[start:end].decode(self._encoding or 'cp437')
+
+    def namelist(self):
+        return [self.name(i) for i in range(len(self.records))]
+
+    def date_time(self, index):
+        value = self.dostimes[index]
+        d = value >> 16
+        t = value & 0xFFFF
+        return ((d>>9)+1980, (d>>5)&0xF, d&0x1F,
+                t>>11, (t>>5)&0x3F, (t&0x1F) * 2)
+
+    def info(self, index):
+        """Return the ZipInfo of the record at index."""
+        x = self._infos.get(index)
+        if x is not None:
+            return x
+        data = self._data
+        pos = self.records[index]
+        centdir = self._struct.unpack_from(data, pos)
+        name_start = pos + sizeCentralDir
+        extra_start = name_start + centdir[_CD_FILENAME_LENGTH]
+        comment_start = extra_start + centdir[_CD_EXTRA_FIELD_LENGTH]
+        end = comment_start + centdir[_CD_COMMENT_LENGTH]
+        x = _make_zipinfo(
+            self._zipinfo_class, centdir,
+            data[name_start:extra_start],
+            data[extra_start:comment_start],
+            data[comment_start:end],
+            self._concat, self._encoding)
+        x._end_offset = self.end_offsets[index]
+        # Another thread might have created it in the meantime.
+        return self._infos.setdefault(index, x)
+
+    def copy(self):
+        """Return a _CentralDirectory sharing the columns of this one,
+        with ZipInfo instances of its own."""
+        central_dir = self.__class__.__new__(self.__class__)
+        central_dir.__dict__.update(self.__dict__)
+        central_dir._infos = {}
+        return central_dir
+
+    def find(self, name):
+        """Return the index of the last record named name, or -1."""
+        if self._sorted is None:
+            # A stable sort keeps duplicate names in archive order.
+            self._sorted = array.array(
+                'Q', sorted(range(len(self.records)), key=self.name))
+        i = bisect.bisect_right(self._sorted, name, key=self.name)
+        if i and self.name(self._sorted[i - 1]) == name:
+            return self._sorted[i - 1]
+        return -1
+
+
+# CHEVAH-FIX
+class _LazyInfoList(collections.abc.Sequence):
+    """ZipFile.filelist of an archive read with a _CentralDirectory."""
+
+    def __init__(self, central_dir):
+        self._central_dir = central_dir
+
+    def __len__(self):
+        return len(self._central_dir)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._central_dir.info(index)
+
+
+# CHEVAH-FIX
+class _LazyNameToInfo(collections.abc.Mapping):
+    """ZipFile.NameToInfo of an archive read with a _CentralDirectory."""
+
+    def __init__(self, central_dir):
+        self._central_dir = central_dir
+
+    def __len__(self):
+        return len(set(self))
+
+    def __iter__(self):
+        seen = set()
+        for name in self._central_dir.namelist():
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._central_dir.find(name) >= 0
+
+    def __getitem__(self, name):
+        if not isinstance(name, str):
+            raise KeyError(name)
+        index = self._central_dir.find(name)
+        if index < 0:
+            raise KeyError(name)
+        return self._central_dir.info(index)
+
+
+# CHEVAH-FIX
+def _prefix_end(prefix):
+    """Return the smallest string greater than all the strings starting
+    with prefix, or None when there is none."""
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# CHEVAH-FIX
+def _parent_dir(name):
+    """Return the directory of name, as posixpath.dirname() of the name
+    without trailing slashes, which is how zipfile.Path finds parents."""
+    path = name.rstrip('/')
+    head = path[:path.rfind('/') + 1]
+    return head.rstrip('/') or head
+
+
+# CHEVAH-FIX
+class _NameIndex:
+    """Names of the members and of their implied directories, sorted and
+    grouped by directory.
+
+    The names with a common prefix are contiguous in the sorted names,
+    so they are found with two bisections.  Implied directories and the
+    children of a directory are the ones of zipfile.Path, and results
+    are returned in the order of the names in the archive, followed by
+    the implied directories, as listed by zipfile.Path.
+    """
+
+    def __init__(self, names, count):
+        # Number of members indexed, to notice the ones added later.
+        self.count = count
+        ranks = {}
+        for rank, name in enumerate(names):
+            ranks.setdefault(name, rank)
+        rank = len(names)
+        dirs = set()
+        for name in names:
+            path = _parent_dir(name)
+            while path.rstrip('/'):
+                parent = path + '/'
+                if parent in dirs:
+                    break
+                dirs.add(parent)
+                if parent not in ranks:
+                    ranks[parent] = rank
+                    rank += 1
+                path = _parent_dir(path)
+        self.names = sorted(ranks)
+        self.ranks = array.array('Q', map(ranks.__getitem__, self.names))
+        # The names in each directory, in the order of their rank.
+        self.children = {}
+        for name in ranks:
+            self.children.setdefault(_parent_dir(name), []).append(name)
+
+    def _range(self, prefix):
+        names = self.names
+        lo = bisect.bisect_left(names, prefix)
+        end = _prefix_end(prefix)
+        if end is None:
+            return lo, len(names)
+        return lo, bisect.bisect_left(names, end, lo)
+
+    def exists(self, name):
+        names = self.names
+        i = bisect.bisect_left(names, name)
+        return i < len(names) and names[i] == name
+
+    def prefixed(self, prefix):
+        names = self.names
+        indexes = list(range(*self._range(prefix)))
+        indexes.sort(key=self.ranks.__getitem__)
+        return [names[i] for i in indexes]
+
+    def listdir(self, path):
+        return list(self.children.get(path.rstrip('/'), ()))
+
 
 class ZipFile:
     """ Class with methods to open, read, write, close, list zip files.
@@ -1417,7 +3172,24 @@ class ZipFile:
           When using ZIP_ZSTANDARD integers -7 though 22 are common,
           see the CompressionParameter enum in compression.zstd for
           details.
-
+    use_mmap: if True and file is a path opened for reading, the archive
+          is memory mapped instead of being read through a file object.
+    columnar: if True, the central directory of an archive opened for
+          reading is kept in compact columns and ZipInfo instances are
+          only created for the members which are asked for.  Member
+          names are decoded when they are first used.
+    index_cache: path of a file caching the columnar central directory
+          of an archive opened for reading.  It is used when the size,
+          modification time and end of central directory record of the
+          archive still match, and rewritten otherwise.  Implies
+          columnar.
+    cache_size: if set, read() keeps the bytes of up to this many bytes
+          of members which are not encrypted, dropping the least
+          recently used ones first.  See cache_info().
+
+    In mode 'r', file can also be any object supporting the buffer
+    protocol, like bytes or mmap.mmap.  Members of archives read from a
+    buffer are available without a copy through getbuffer().
     """
 
     # CHEVAH-FIX
@@ -1425,11 +3197,41 @@ class ZipFile:
     _ZipExtFile = ZipExtFile
 
     fp = None                   # Set here since __del__ checks it
+    # CHEVAH-FIX
+    # Serialized central directory of a pickled archive, used by __init__
+    # when unpickling it.
+    _pickled_index = None
+    # Central directory already parsed for a nested archive, used by
+    # __init__ when open_archive() opens it again.
+    _nested_central_dir = None
+    _endrec = None
+    # CHEVAH-FIX
+    # Members spanning up to this many bytes in the archive, with their
+    # local header, are read by read() with a single read.
+    MAX_SMALL_READ = 1 << 16
+    # Largest read done by iter_read() for a batch of members, and
+    # largest gap between members read in the same batch.
+    MAX_BATCH_READ = 1 << 24
+    MAX_BATCH_GAP = 1 << 16
+    # Bytes read by the first open of a member to get its local header,
+    # name and extra field at once.
+    LOCAL_HEADER_READ = 1 << 9
+    # Most data offsets kept by _data_offset(), the least recently used
+    # are dropped first.
+    MAX_DATA_OFFSETS = 1 << 16
+    # Nested archives up to this size are decompressed in memory by
+    # open_archive(), larger ones to a memory mapped temporary file.
+    MAX_NESTED_MEMORY = 1 << 26
+    # Members compressed by write_many() are kept in memory up to this
+    # many compressed bytes, and in a temporary file above.
+    MAX_SPILL_MEMORY = 1 << 24
     _windows_illegal_name_trans_table = None
     _ignore_invalid_names = False
 
     def __init__(self, file, mode="r", compression=ZIP_STORED, allowZip64=True,
-                 compresslevel=None, *, strict_timestamps=True, metadata_encoding=None):
+                 compresslevel=None, *, strict_timestamps=True, metadata_encoding=None,
+                 use_mmap=False, columnar=False, index_cache=None,
+                 cache_size=None):
         """Open the ZIP file with mode read 'r', write 'w', exclusive create
         'x', or append 'a'."""
         if mode not in ('r', 'w', 'x', 'a'):
@@ -1454,11 +3256,47 @@ class ZipFile:
         if self.metadata_encoding and mode != 'r':
             raise ValueError(
                 "metadata_encoding is only supported for reading files")
+        # CHEVAH-FIX
+        if use_mmap and mode != 'r':
+            raise ValueError("use_mmap is only supported for reading files")
+        if columnar and mode != 'r':
+            raise ValueError("columnar is only supported for reading files")
+        if index_cache is not None and mode != 'r':
+            raise ValueError("index_cache is only supported for reading files")
+        if cache_size is not None:
+            if mode != 'r':
+                raise ValueError(
+                    "cache_size is only supported for reading files")
+            if cache_size < 0:
+                raise ValueError("cache_size must be non-negative")
+            self._cache = _MemberCache(cache_size)
+        else:
+            self._cache = None
+        self._buffer = None
+        self._columnar = columnar or index_cache is not None
+        if index_cache is not None:
+            index_cache = os.fspath(index_cache)
+        self._index_cache = index_cache
+        self._central_dir = None
+        # Arguments to open the archive again when unpickled.
+        self._reopen_kwargs = {
+            'metadata_encoding': metadata_encoding,
+            'use_mmap': use_mmap,
+            'columnar': columnar,
+            'index_cache': index_cache,
+            'cache_size': cache_size,
+        }
 
         # Check if we were passed a file-like object
         if isinstance(file, os.PathLike):
             file = os.fspath(file)
-        if isinstance(file, str):
+        if isinstance(file, str) and use_mmap:
+            # CHEVAH-FIX
+            self._filePassed = 0
+            self.filename = file
+            self.fp = _BufferFile.from_path(file)
+            self._buffer = self.fp._view
+        elif isinstance(file, str):
             # No, it's a filename
             self._filePassed = 0
             self.filename = file
@@ -1474,14 +3312,37 @@ class ZipFile:
                         continue
                     raise
                 break
+        elif mode == 'r' and _is_buffer_archive(file):
+            # CHEVAH-FIX
+            # The wrapper is closed by us, the buffer is left to the caller.
+            self._filePassed = 0
+            self.fp = _BufferFile(file)
+            self.filename = None
+            self._buffer = self.fp._view
         else:
             self._filePassed = 1
             self.fp = file
             self.filename = getattr(file, 'name', None)
         self._fileRefCnt = 1
         self._lock = threading.RLock()
+        # CHEVAH-FIX
+        # Maps the header offset of the members opened last to their
+        # name and the offset of their data, see _data_offset().
+        self._data_offsets = collections.OrderedDict()
+        # Decompressed nested archives, see open_archive().
+        self._nested = {}
+        # Built on first use by _name_index().
+        self._names_index = None
         self._seekable = True
         self._writing = False
+        # CHEVAH-FIX
+        # Members of files opened here for reading are read with pread().
+        # File objects passed by the caller might be buffered or shared.
+        self._fd = None
+        if (mode == 'r' and not self._filePassed and self._buffer is None
+                and hasattr(os, 'pread')):
+            self._fd = self.fp.fileno()
+        _live_zipfiles.add(self)
 
         try:
             if mode == 'r':
@@ -1530,6 +3391,58 @@ class ZipFile:
     def __exit__(self, type, value, traceback):
         self.close()
 
+    # CHEVAH-FIX
+    def __reduce__(self):
+        """Pickle an archive read from a path as its path, its arguments
+        and its serialized central directory.
+
+        The unpickled ZipFile opens the path again with its own file
+        descriptor and the same arguments.  When columnar, it uses the
+        central directory as it is instead of parsing it, if the archive
+        was not changed meanwhile.
+        """
+        if (self.mode != 'r' or self._filePassed or self.filename is None
+                or not self.fp):
+            raise TypeError(
+                "cannot pickle %r object: only open archives read from a "
+                "path can be pickled" % type(self).__name__)
+        index = None
+        if self._columnar:
+            with self._lock:
+                index = self.__dict__.get('_index_bytes')
+                if index is None:
+                    index = self._serialize_index()
+                    self._index_bytes = index
+        return (_unpickle_zipfile,
+                (type(self), os.path.abspath(self.filename),
+                 self._reopen_kwargs, index))
+
+    # CHEVAH-FIX
+    def _serialize_index(self):
+        key = self._index_key(self._endrec)
+        if key is None:
+            return None
+        central_dir = self._central_dir
+        if central_dir is None:
+            offset_cd, concat = _handle_prepended_data(self._endrec)
+            central_dir = _CentralDirectory(
+                bytes(self._read_at(self.start_dir, self._endrec[_ECD_SIZE])),
+                concat, self.start_dir, self._ZipInfo,
+                self.metadata_encoding)
+        return central_dir.to_bytes(key)
+
+    # CHEVAH-FIX
+    def _after_fork(self):
+        """Make the archive usable in a forked child process."""
+        # Locks held by the threads of the parent would never be released.
+        self._lock = threading.RLock()
+        if self._cache is not None:
+            self._cache._lock = threading.Lock()
+        # Member files opened before the fork keep the old lock and must
+        # not be used by the child.  The file offset stays shared with the
+        # parent, archives opened from a path don't depend on it, as they
+        # are read with pread() when available.
+
     def __repr__(self):
         result = ['<%s.%s' % (self.__class__.__module__,
                               self.__class__.__qualname__)]
@@ -1556,6 +3469,8 @@ class ZipFile:
         if self.debug > 1:
             print(endrec)
         self._comment = endrec[_ECD_COMMENT]    # archive comment
+        # CHEVAH-FIX
+        self._endrec = endrec
 
         offset_cd, concat = _handle_prepended_data(endrec, self.debug)
 
@@ -1564,6 +3479,10 @@ class ZipFile:
 
         if self.start_dir < 0:
             raise BadZipFile("Bad offset for central directory")
+        # CHEVAH-FIX
+        if self._columnar:
+            self._read_central_dir(endrec, concat)
+            return
         fp.seek(self.start_dir, 0)
         size_cd = endrec[_ECD_SIZE]
         data = fp.read(size_cd)
@@ -1579,33 +3498,11 @@ class ZipFile:
             if self.debug > 2:
                 print(centdir)
             filename = fp.read(centdir[_CD_FILENAME_LENGTH])
-            orig_filename_crc = crc32(filename)
-            flags = centdir[_CD_FLAG_BITS]
-            if flags & _MASK_UTF_FILENAME:
-                # UTF-8 file names extension
-                filename = filename.decode('utf-8')
-            else:
-                # Historical ZIP filename encoding
-                filename = filename.decode(self.metadata_encoding or 'cp437')
-            # Create ZipInfo instance to store file information
             # CHEVAH-FIX
-            x = self._ZipInfo(filename)
-            x.extra = fp.read(centdir[_CD_EXTRA_FIELD_LENGTH])
-            x.comment = fp.read(centdir[_CD_COMMENT_LENGTH])
-            x.header_offset = centdir[_CD_LOCAL_HEADER_OFFSET]
-            (x.create_version, x.create_system, x.extract_version, x.reserved,
-             x.flag_bits, x.compress_type, t, d,
-             x.CRC, x.compress_size, x.file_size) = centdir[1:12]
-            if x.extract_version > MAX_EXTRACT_VERSION:
-                raise NotImplementedError("zip file version %.1f" %
-                                          (x.extract_version / 10))
-            x.volume, x.internal_attr, x.external_attr = centdir[15:18]
-            # Convert date/time code to (year, month, day, hour, min, sec)
-            x._raw_time = t
-            x.date_time = ( (d>>9)+1980, (d>>5)&0xF, d&0x1F,
-                            t>>11, (t>>5)&0x3F, (t&0x1F) * 2 )
-            x._decodeExtra(orig_filename_crc)
-            x.header_offset = x.header_offset + concat
+            x = _make_zipinfo(self._ZipInfo, centdir, filename,
+                              fp.read(centdir[_CD_EXTRA_FIELD_LENGTH]),
+                              fp.read(centdir[_CD_COMMENT_LENGTH]),
+                              concat, self.metadata_encoding)
             self.filelist.append(x)
             self.NameToInfo[x.filename] = x
 
@@ -1623,8 +3520,63 @@ class ZipFile:
             zinfo._end_offset = end_offset
             end_offset = zinfo.header_offset
 
+    # CHEVAH-FIX
+    def _read_central_dir(self, endrec, concat):
+        """Read the central directory into a _CentralDirectory, using the
+        index cache when there is an up to date one."""
+        key = None
+        central_dir = None
+        if self._nested_central_dir is not None:
+            central_dir = self._nested_central_dir.copy()
+        elif (self._index_cache is not None or
+                self._pickled_index is not None):
+            key = self._index_key(endrec)
+        if key is not None and self._pickled_index is not None:
+            central_dir = _CentralDirectory.from_bytes(
+                self._pickled_index, key, self._ZipInfo)
+        if (central_dir is None and key is not None and
+                self._index_cache is not None):
+            central_dir = _CentralDirectory.load(
+                self._index_cache, key, self._ZipInfo)
+        if central_dir is None:
+            self.fp.seek(self.start_dir, 0)
+            data = self.fp.read(endrec[_ECD_SIZE])
+            central_dir = _CentralDirectory(
+                data, concat, self.start_dir, self._ZipInfo,
+                self.metadata_encoding)
+            if key is not None and self._index_cache is not None:
+                central_dir.dump(self._index_cache, key)
+        self._central_dir = central_dir
+        self.filelist = _LazyInfoList(central_dir)
+        self.NameToInfo = _LazyNameToInfo(central_dir)
+
+    # CHEVAH-FIX
+    def _index_key(self, endrec):
+        """Return the key identifying the archive in the index cache,
+        or None when the archive can't be identified."""
+        # Stat the file which was read, the path might have been replaced
+        # since.
+        try:
+            if isinstance(self.fp, _BufferFile):
+                st = self.fp.stat
+            else:
+                st = os.fstat(self.fp.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+        if st is None:
+            return None
+        eocd = struct.pack('<4Q', endrec[_ECD_ENTRIES_TOTAL],
+                           endrec[_ECD_SIZE], endrec[_ECD_OFFSET],
+                           endrec[_ECD_LOCATION])
+        checksum = crc32(endrec[_ECD_COMMENT], crc32(eocd))
+        return (st.st_size, st.st_mtime_ns, checksum,
+                self.metadata_encoding or '')
+
     def namelist(self):
         """Return a list of file names in the archive."""
+        # CHEVAH-FIX
+        if self._central_dir is not None:
+            return self._central_dir.namelist()
         return [data.filename for data in self.filelist]
 
     def infolist(self):
@@ -1636,6 +3588,14 @@ class ZipFile:
         """Print a table of contents for the zip file."""
         print("%-46s %19s %12s" % ("File Name", "Modified    ", "Size"),
               file=file)
+        # CHEVAH-FIX
+        if self._central_dir is not None:
+            cdir = self._central_dir
+            for i in range(len(cdir)):
+                date = "%d-%02d-%02d %02d:%02d:%02d" % cdir.date_time(i)
+                print("%-46s %s %12d" % (cdir.name(i), date, cdir.file_sizes[i]),
+                      file=file)
+            return
         for zinfo in self.filelist:
             date = "%d-%02d-%02d %02d:%02d:%02d" % zinfo.date_time[:6]
             print("%-46s %s %12d" % (zinfo.filename, date, zinfo.file_size),
@@ -1666,6 +3626,63 @@ class ZipFile:
 
         return info
 
+    # CHEVAH-FIX
+    def _name_index(self):
+        """Return the _NameIndex of the members, built on first use and
+        again after members were added."""
+        index = self._names_index
+        count = len(self.filelist)
+        if index is None or index.count != count:
+            # Subclasses such as zipfile.Path's also list implied
+            # directories in namelist().
+            index = _NameIndex(ZipFile.namelist(self), count)
+            self._names_index = index
+        return index
+
+    # CHEVAH-FIX
+    def listdir(self, path=''):
+        """Return the names of the entries in the directory path.
+
+        Names are full archive names, in the order of namelist(), and
+        directories end with a slash.  Directories implied by the names
+        of other members are listed too, after the others.  path is ''
+        for the top level directory.
+        """
+        prefix = path.rstrip('/') + '/' if path.rstrip('/') else ''
+        index = self._name_index()
+        if prefix and not index.exists(prefix):
+            raise KeyError(
+                'There is no directory named %r in the archive' % path)
+        return index.listdir(prefix)
+
+    # CHEVAH-FIX
+    def names_with_prefix(self, prefix):
+        """Return the names starting with prefix, including the implied
+        directories, in the order of listdir().
+
+        With a directory name as prefix, this selects a subtree, for
+        example to pass as the members of extractall().
+        """
+        return self._name_index().prefixed(prefix)
+
+    # CHEVAH-FIX
+    def glob(self, pattern):
+        """Return the names matching the shell style pattern, including
+        the implied directories, in the order of listdir().
+
+        Wildcards don't match a slash, except for a '**' path component
+        which matches any number of directories.  A directory matches
+        with or without its trailing slash.
+        """
+        import glob
+        import re
+        match = re.compile(glob.translate(
+            pattern, recursive=True, include_hidden=True, seps='/')).match
+        literal = re.match(r'[^*?[]*', pattern).group()
+        return [name for name in self.names_with_prefix(literal)
+                if match(name) or
+                name.endswith('/') and match(name[:-1])]
+
     def setpassword(self, pwd):
         """Set default password for encrypted files."""
         if pwd and not isinstance(pwd, bytes):
@@ -1696,10 +3713,255 @@ class ZipFile:
     def read(self, name, pwd=None):
         """Return file bytes for name. 'pwd' is the password to decrypt
         encrypted files."""
+        # CHEVAH-FIX
+        if self.fp and not self._writing:
+            zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+            cache = self._cache
+            if cache is not None and not zinfo.flag_bits & _MASK_ENCRYPTED:
+                key = (zinfo.header_offset, zinfo.CRC)
+                data = cache.get(key)
+                if data is None:
+                    data = self._read_member(name, zinfo, pwd)
+                    cache.put(key, data)
+                return data
+            return self._read_member(name, zinfo, pwd)
         with self.open(name, "r", pwd) as fp:
             return fp.read()
 
-    def open(self, name, mode="r", pwd=None, *, force_zip64=False):
+    # CHEVAH-FIX
+    def _read_member(self, name, zinfo, pwd):
+        # Members are decoded here only when _ZipExtFile is not overridden
+        # by a subclass, as it would be skipped.
+        if (self._ZipExtFile is ZipExtFile and
+                zinfo._end_offset is not None and
+                0 < zinfo._end_offset - zinfo.header_offset
+                <= self.MAX_SMALL_READ):
+            data = self._read_small(zinfo)
+            if data is not None:
+                return data
+        with self.open(name, "r", pwd) as fp:
+            return fp.read()
+
+    # CHEVAH-FIX
+    def cache_info(self):
+        """Return the statistics of the member cache of read(), as a named
+        tuple of hits, misses, evictions, maxsize and currsize, or None
+        when cache_size was not set."""
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    # CHEVAH-FIX
+    def cache_clear(self):
+        """Drop the members kept by the cache of read()."""
+        if self._cache is not None:
+            self._cache.clear()
+
+    # CHEVAH-FIX
+    def read_many(self, names, pwd=None, *, max_workers=None):
+        """Return a dict mapping each name in names to its bytes.
+
+        names can hold member names or ZipInfo objects, which are mapped
+        by their filename.  See iter_read() for max_workers.
+        """
+        return {zinfo.filename: data for zinfo, data in
+                self.iter_read(names, pwd, max_workers=max_workers)}
+
+    # CHEVAH-FIX
+    def iter_read(self, names, pwd=None, *, max_workers=None):
+        """Yield (zinfo, bytes) for each member in names.
+
+        Members are read in the order of their position in the archive.
+        Neighbouring members are fetched with a single read of up to
+        MAX_BATCH_READ bytes, including gaps of at most MAX_BATCH_GAP
+        bytes.  With max_workers, members are decompressed on a pool of
+        that many threads, as the decompressors release the GIL.
+        """
+        if not self.fp:
+            raise ValueError(
+                "Attempt to use ZIP archive that was already closed")
+        zinfos = [name if isinstance(name, ZipInfo) else self.getinfo(name)
+                  for name in names]
+        zinfos.sort(key=lambda zinfo: zinfo.header_offset)
+        cache = self._cache
+        if cache is not None:
+            pending = []
+            for zinfo in zinfos:
+                data = None
+                if not zinfo.flag_bits & _MASK_ENCRYPTED:
+                    data = cache.get((zinfo.header_offset, zinfo.CRC))
+                if data is None:
+                    pending.append(zinfo)
+                else:
+                    yield zinfo, data
+            zinfos = pending
+
+        if max_workers:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers)
+            decode = executor.map
+        else:
+            executor = None
+            decode = map
+        try:
+            for batch, start, end in self._batches(zinfos):
+                if start == end or self._ZipExtFile is not ZipExtFile:
+                    datas = (None for zinfo in batch)
+                else:
+                    region = self._read_at(start, end - start)
+                    datas = decode(
+                        self._decode_member, batch,
+                        [region[zinfo.header_offset - start:
+                                zinfo._end_offset - start]
+                         for zinfo in batch])
+                for zinfo, data in zip(batch, datas):
+                    if data is None:
+                        data = self._read_member(zinfo, zinfo, pwd)
+                    if (cache is not None and
+                            not zinfo.flag_bits & _MASK_ENCRYPTED):
+                        cache.put((zinfo.header_offset, zinfo.CRC), data)
+                    yield zinfo, data
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    # CHEVAH-FIX
+    def _batches(self, zinfos):
+        """Yield (zinfos, start, end) for the groups of members of the
+        sorted zinfos which can be read together from start to end.
+
+        Members which can't be read in a batch are yielded alone, with
+        start equal to end.
+        """
+        batch = []
+        start = end = 0
+        for zinfo in zinfos:
+            if (zinfo._end_offset is None or
+                    zinfo.flag_bits & _MASK_ENCRYPTED or
+                    zinfo._end_offset <= zinfo.header_offset):
+                if batch:
+                    yield batch, start, end
+                    batch = []
+                yield [zinfo], 0, 0
+                continue
+            if batch and (
+                    zinfo.header_offset - end > self.MAX_BATCH_GAP or
+                    max(end, zinfo._end_offset) - start >
+                        self.MAX_BATCH_READ):
+                yield batch, start, end
+                batch = []
+            if not batch:
+                start = zinfo.header_offset
+                end = zinfo._end_offset
+            else:
+                end = max(end, zinfo._end_offset)
+            batch.append(zinfo)
+        if batch:
+            yield batch, start, end
+
+    # CHEVAH-FIX
+    def getbuffer(self, name, pwd=None):
+        """Return a read-only memoryview of the bytes of member 'name'.
+
+        For archives read from a buffer or with use_mmap, the view of a
+        stored member which is not encrypted is a slice of the archive
+        buffer, so no data is copied.  Other members are decompressed
+        into a new bytes object.
+        """
+        with self.open(name, "r", pwd) as fp:
+            if (self._buffer is not None and
+                    fp._compress_type == ZIP_STORED and
+                    fp._decrypter is None):
+                start = fp._fileobj.tell()
+                view = self._buffer[start:start + fp._compress_left]
+                if (fp._expected_crc is not None and
+                        crc32(view) != fp._expected_crc):
+                    raise BadZipFile("Bad CRC-32 for file %r" % fp.name)
+                return view
+            return memoryview(fp.read())
+
+    # CHEVAH-FIX
+    def open_archive(self, name, pwd=None, **kwargs):
+        """Return a ZipFile reading the archive stored as member 'name'.
+
+        Other keyword arguments are passed to ZipFile, which defaults to
+        columnar for nested archives.
+
+        Stored members which are not encrypted are read in place, which
+        costs no copy for archives read from a buffer or with use_mmap.
+        Other members are decompressed once, in memory or to a temporary
+        file up to MAX_NESTED_MEMORY bytes, and kept until this archive is
+        closed, so reopening them is as cheap as for a top-level archive
+        read from a buffer.  The central directory of columnar nested
+        archives is parsed once as well, and reused when they are opened
+        again.
+        """
+        if not self.fp:
+            raise ValueError(
+                "Attempt to use ZIP archive that was already closed")
+        kwargs.setdefault('columnar', True)
+        zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+        key = (zinfo.header_offset, zinfo.CRC)
+        if (zinfo.compress_type == ZIP_STORED and
+                not zinfo.flag_bits & _MASK_ENCRYPTED):
+            with self._lock:
+                nested = self._nested.setdefault(key, [None, {}])
+            if self._buffer is not None:
+                zef_file = self._open_data(zinfo)
+                start = zef_file.tell()
+                zef_file.close()
+                return self._open_nested(
+                    self._buffer[start:start + zinfo.file_size], nested[1],
+                    kwargs)
+            # Seeking a stored member is cheap.
+            zef_file = self.open(zinfo, pwd=pwd)
+            try:
+                archive = self._open_nested(zef_file, nested[1], kwargs)
+            except:
+                zef_file.close()
+                raise
+            # The member file is closed with the nested archive.
+            archive._filePassed = 0
+            return archive
+
+        with self._lock:
+            nested = self._nested.get(key)
+            if nested is None:
+                nested = [self._spill(zinfo, pwd), {}]
+                self._nested[key] = nested
+        return self._open_nested(nested[0], nested[1], kwargs)
+
+    # CHEVAH-FIX
+    def _open_nested(self, file, central_dirs, kwargs):
+        """Return a ZipFile reading the nested archive file, with the
+        central directory in central_dirs when it was already parsed."""
+        # The names of the records depend on the metadata encoding.
+        encoding = kwargs.get('metadata_encoding')
+        archive = ZipFile.__new__(ZipFile)
+        archive._nested_central_dir = central_dirs.get(encoding)
+        try:
+            archive.__init__(file, **kwargs)
+        finally:
+            archive._nested_central_dir = None
+        if archive._central_dir is not None:
+            central_dirs.setdefault(encoding, archive._central_dir)
+        return archive
+
+    # CHEVAH-FIX
+    def _spill(self, zinfo, pwd):
+        """Return the bytes of member zinfo as a buffer."""
+        if zinfo.file_size <= self.MAX_NESTED_MEMORY:
+            return self.read(zinfo, pwd)
+        import mmap
+        import tempfile
+        with tempfile.TemporaryFile() as tmp:
+            with self.open(zinfo, pwd=pwd) as source:
+                shutil.copyfileobj(source, tmp)
+            tmp.flush()
+            return mmap.mmap(tmp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def open(self, name, mode="r", pwd=None, *, force_zip64=False,
+             max_workers=None):
         """Return file-like object for 'name'.
 
         name is a string for the file name within the ZIP file, or a ZipInfo
@@ -1714,6 +3976,10 @@ class ZipFile:
         exceed 2 GiB, pass force_zip64 to use the ZIP64 format, which can
         handle large files.  If the size is known in advance, it is best to
         pass a ZipInfo instance for name, with zinfo.file_size set.
+
+        When writing a ZIP_DEFLATED member, pass max_workers to compress
+        it in blocks on a pool of that many threads.  The output is a bit
+        larger, as blocks don't share matches over 32 KiB.
         """
         if mode not in {"r", "w"}:
             raise ValueError('open() requires mode "r" or "w"')
@@ -1737,7 +4003,8 @@ class ZipFile:
             zinfo = self.getinfo(name)
 
         if mode == 'w':
-            return self._open_to_write(zinfo, force_zip64=force_zip64)
+            return self._open_to_write(zinfo, force_zip64=force_zip64,
+                                       max_workers=max_workers)
 
         if self._writing:
             raise ValueError("Can't read from the ZIP file while there "
@@ -1745,43 +4012,43 @@ class ZipFile:
                     "Close the writing handle before trying to read.")
 
         # Open for reading:
-        self._fileRefCnt += 1
-        zef_file = _SharedFile(self.fp, zinfo.header_offset,
-                               self._fpclose, self._lock, lambda: self._writing)
+        # CHEVAH-FIX
+        zef_file = self._open_data(zinfo)
         try:
-            # Skip the file header:
-            fheader = zef_file.read(sizeFileHeader)
-            if len(fheader) != sizeFileHeader:
-                raise BadZipFile("Truncated file header")
-            fheader = struct.unpack(structFileHeader, fheader)
-            if fheader[_FH_SIGNATURE] != stringFileHeader:
-                raise BadZipFile("Bad magic number for file header")
-
-            fname = zef_file.read(fheader[_FH_FILENAME_LENGTH])
-            if fheader[_FH_EXTRA_FIELD_LENGTH]:
-                zef_file.seek(fheader[_FH_EXTRA_FIELD_LENGTH], whence=1)
-
-            if zinfo.flag_bits & _MASK_COMPRESSED_PATCH:
-                # Zip 2.7: compressed patched data
-                raise NotImplementedError("compressed patched data (flag bit 5)")
-
-            if zinfo.flag_bits & _MASK_STRONG_ENCRYPTION:
-                # strong encryption
-                raise NotImplementedError("strong encryption (flag bit 6)")
-
-            if fheader[_FH_GENERAL_PURPOSE_FLAG_BITS] & _MASK_UTF_FILENAME:
-                # UTF-8 filename
-                fname_str = fname.decode("utf-8")
+            # check for encrypted flag & handle password
+            is_encrypted = zinfo.flag_bits & _MASK_ENCRYPTED
+            if is_encrypted:
+                if not pwd:
+                    pwd = self.pwd
+                if pwd and not isinstance(pwd, bytes):
+                    raise TypeError("pwd: expected bytes, got %s" % type(pwd).__name__)
+                if not pwd:
+                    raise RuntimeError("File %r is encrypted, password "
+                                       "required for extraction" % name)
             else:
-                fname_str = fname.decode(self.metadata_encoding or "cp437")
+                pwd = None
 
-            if fname_str != zinfo.orig_filename:
-                raise BadZipFile(
-                    'File name in directory %r and header %r differ.'
-                    % (zinfo.orig_filename, fname))
+            # CHEVAH-FIX
+            return self._ZipExtFile(zef_file, mode + 'b', zinfo, pwd, True)
+        except:
+            zef_file.close()
+            raise
 
+    # CHEVAH-FIX
+    def _open_data(self, zinfo):
+        """Return a shared file positioned at the data of zinfo."""
+        # Skip the file header:
+        data_offset = self._data_offset(zinfo)
+        self._fileRefCnt += 1
+        if self._buffer is not None:
+            zef_file = _SharedBuffer(self.fp, data_offset, self._fpclose)
+        else:
+            zef_file = _SharedFile(self.fp, data_offset,
+                                   self._fpclose, self._lock,
+                                   lambda: self._writing, self._fd)
+        try:
             if (zinfo._end_offset is not None and
-                zef_file.tell() + zinfo.compress_size > zinfo._end_offset):
+                data_offset + zinfo.compress_size > zinfo._end_offset):
                 if zinfo._end_offset == zinfo.header_offset:
                     import warnings
                     warnings.warn(
@@ -1792,27 +4059,261 @@ class ZipFile:
                     raise BadZipFile(
                         f"Overlapped entries: {zinfo.orig_filename!r} "
                         f"(possible zip bomb)")
+        except:
+            zef_file.close()
+            raise
+        return zef_file
+
+    # CHEVAH-FIX
+    def open_raw(self, name):
+        """Return a binary file object reading the compressed data of
+        member 'name', as stored in the archive.
+
+        name is a string for the file name within the ZIP file, or a ZipInfo
+        object.  The data is not decompressed nor checked against its
+        CRC-32.  Encrypted members are not supported.
+        """
+        return self._open_raw(name, b'', b'')
+
+    # CHEVAH-FIX
+    def open_gzip(self, name):
+        """Return a binary file object reading deflated member 'name' as
+        a gzip stream.
+
+        The deflate data is read as stored in the archive, between a gzip
+        header and a trailer holding the CRC-32 and size from the central
+        directory, so nothing is decompressed or compressed.  The stream
+        has no file name and no modification time.
+        """
+        zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+        if zinfo.compress_type != ZIP_DEFLATED:
+            raise ValueError("File %r is not deflated" % zinfo.filename)
+        # Magic, deflate method, no flags, no mtime, no extra flags,
+        # unknown OS.
+        header = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+        trailer = struct.pack("<LL", zinfo.CRC, zinfo.file_size & 0xFFFFFFFF)
+        return self._open_raw(zinfo, header, trailer)
+
+    # CHEVAH-FIX
+    def sendfile(self, name, out, offset=0, count=None):
+        """Send the data of stored member 'name' to out and return the
+        number of bytes sent.
+
+        out is a socket, a file descriptor or a binary file object.  offset
+        and count select a byte range of the member, like for HTTP Range
+        requests; by default the whole member is sent.
+
+        When the archive was opened from a path, the data goes from the
+        archive to out with os.sendfile() without passing through Python.
+        Otherwise, or if os.sendfile() can't be used for out, the data is
+        copied in chunks.  Only stored members which are not encrypted are
+        supported and their CRC-32 is not checked.
+        """
+        if not self.fp:
+            raise ValueError(
+                "Attempt to use ZIP archive that was already closed")
+        zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+        if self._writing:
+            raise ValueError("Can't read from the ZIP file while there "
+                    "is an open writing handle on it. "
+                    "Close the writing handle before trying to read.")
+        if zinfo.compress_type != ZIP_STORED:
+            raise ValueError("File %r is not stored" % zinfo.filename)
+        if zinfo.flag_bits & _MASK_ENCRYPTED:
+            raise ValueError("File %r is encrypted" % zinfo.filename)
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        if count is not None and count < 0:
+            raise ValueError("count must be non-negative")
+
+        size = min(zinfo.compress_size, zinfo.file_size)
+        start = min(offset, size)
+        end = size if count is None else min(size, start + count)
+        zef_file = self._open_data(zinfo)
+        try:
+            pos = zef_file.tell() + start
+            end += zef_file.tell()
+            sent = self._sendfile(out, pos, end)
+            pos += sent
+            while pos < end:
+                zef_file.seek(pos)
+                data = zef_file.read(min(shutil.COPY_BUFSIZE, end - pos))
+                if not data:
+                    raise EOFError
+                _write_all(out, data)
+                pos += len(data)
+                sent += len(data)
+            return sent
+        finally:
+            zef_file.close()
+
+    # CHEVAH-FIX
+    def _sendfile(self, out, pos, end):
+        """Send the archive bytes from pos to end to out with
+        os.sendfile(), as far as possible, and return how many were sent."""
+        # Only the descriptor of an archive opened from a path is known to
+        # hold its bytes, the descriptor of a file object passed by the
+        # caller might be one of a compressed or encrypted file.
+        in_fd = self._fd
+        if not hasattr(os, 'sendfile') or in_fd is None:
+            return 0
+        if hasattr(out, 'gettimeout') and out.gettimeout() is not None:
+            # Leave sockets with a timeout to sendall().
+            return 0
+        try:
+            out_fd = out if isinstance(out, int) else out.fileno()
+        except (AttributeError, OSError, ValueError):
+            return 0
+        if not isinstance(out, int) and hasattr(out, 'flush'):
+            out.flush()
+        sent = 0
+        while pos < end:
+            try:
+                n = os.sendfile(out_fd, in_fd, pos, min(end - pos, 1 << 30))
+            except OSError:
+                if sent:
+                    raise
+                # Not supported for these files, copy the data instead.
+                return 0
+            if not n:
+                raise EOFError
+            pos += n
+            sent += n
+        return sent
+
+    # CHEVAH-FIX
+    def _open_raw(self, name, prefix, suffix):
+        if not self.fp:
+            raise ValueError(
+                "Attempt to use ZIP archive that was already closed")
+        zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+        if self._writing:
+            raise ValueError("Can't read from the ZIP file while there "
+                    "is an open writing handle on it. "
+                    "Close the writing handle before trying to read.")
+        if zinfo.flag_bits & _MASK_ENCRYPTED:
+            raise ValueError("File %r is encrypted" % zinfo.filename)
+        return _RawMemberFile(self._open_data(zinfo), zinfo.compress_size,
+                              prefix, suffix, zinfo.filename)
+
+    # CHEVAH-FIX
+    def _data_offset(self, zinfo):
+        """Return the offset of the data of zinfo, after checking its
+        local file header.
+
+        The result is cached for the last MAX_DATA_OFFSETS members, so
+        the local header is usually only read by the first open of a
+        member.  A cold read fetches the header together
+        with the name and the extra field, when they fit in
+        LOCAL_HEADER_READ bytes.
+        """
+        self._check_flags(zinfo)
+        offsets = self._data_offsets
+        with self._lock:
+            cached = offsets.get(zinfo.header_offset)
+            if cached is not None and cached[0] == zinfo.orig_filename:
+                offsets.move_to_end(zinfo.header_offset)
+                return cached[1]
+
+        data = self._read_at(zinfo.header_offset, self.LOCAL_HEADER_READ)
+        fheader = _unpack_file_header(data)
+        name_end = sizeFileHeader + fheader[_FH_FILENAME_LENGTH]
+        if name_end > len(data):
+            data = self._read_at(zinfo.header_offset, name_end)
+        self._check_file_header(
+            zinfo, fheader, bytes(data[sizeFileHeader:name_end]))
+
+        data_offset = (
+            zinfo.header_offset + name_end + fheader[_FH_EXTRA_FIELD_LENGTH])
+        with self._lock:
+            offsets[zinfo.header_offset] = (zinfo.orig_filename, data_offset)
+            offsets.move_to_end(zinfo.header_offset)
+            while len(offsets) > self.MAX_DATA_OFFSETS:
+                offsets.popitem(last=False)
+        return data_offset
+
+    # CHEVAH-FIX
+    def _check_flags(self, zinfo):
+        """Raise NotImplementedError for the features zinfo needs which
+        are not supported."""
+        if zinfo.flag_bits & _MASK_COMPRESSED_PATCH:
+            # Zip 2.7: compressed patched data
+            raise NotImplementedError("compressed patched data (flag bit 5)")
+
+        if zinfo.flag_bits & _MASK_STRONG_ENCRYPTION:
+            # strong encryption
+            raise NotImplementedError("strong encryption (flag bit 6)")
+
+    # CHEVAH-FIX
+    def _check_file_header(self, zinfo, fheader, fname):
+        """Check the unpacked local file header and file name of zinfo."""
+        self._check_flags(zinfo)
+        if fheader[_FH_GENERAL_PURPOSE_FLAG_BITS] & _MASK_UTF_FILENAME:
+            # UTF-8 filename
+            fname_str = fname.decode("utf-8")
+        else:
+            fname_str = fname.decode(self.metadata_encoding or "cp437")
 
-            # check for encrypted flag & handle password
-            is_encrypted = zinfo.flag_bits & _MASK_ENCRYPTED
-            if is_encrypted:
-                if not pwd:
-                    pwd = self.pwd
-                if pwd and not isinstance(pwd, bytes):
-                    raise TypeError("pwd: expected bytes, got %s" % type(pwd).__name__)
-                if not pwd:
-                    raise RuntimeError("File %r is encrypted, password "
-                                       "required for extraction" % name)
-            else:
-                pwd = None
+        if fname_str != zinfo.orig_filename:
+            raise BadZipFile(
+                'File name in directory %r and header %r differ.'
+                % (zinfo.orig_filename, fname))
 
-            # CHEVAH-FIX
-            return self._ZipExtFile(zef_file, mode + 'b', zinfo, pwd, True)
-        except:
-            zef_file.close()
-            raise
+    # CHEVAH-FIX
+    def _read_at(self, offset, n):
+        """Return n bytes of the archive from offset, without moving the
+        read position of the open members."""
+        if self._buffer is not None:
+            return self._buffer[offset:offset + n]
+        if self._fd is not None:
+            return _pread(self._fd, n, offset)
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't read from the ZIP file while there "
+                        "is an open writing handle on it. "
+                        "Close the writing handle before trying to read.")
+            self.fp.seek(offset)
+            return self.fp.read(n)
+
+    # CHEVAH-FIX
+    def _read_small(self, zinfo):
+        """Return the bytes of a small member, read with a single read
+        and decompressed with a single call.
+
+        Return None for members which need the checks and errors of
+        open(), like the encrypted or the overlapping ones.
+        """
+        if zinfo.flag_bits & _MASK_ENCRYPTED:
+            return None
+        return self._decode_member(zinfo, self._read_at(
+            zinfo.header_offset, zinfo._end_offset - zinfo.header_offset))
+
+    # CHEVAH-FIX
+    def _decode_member(self, zinfo, data):
+        """Return the bytes of member zinfo from data, holding its local
+        header and compressed data, or None when open() has to be used."""
+        if zinfo.flag_bits & _MASK_ENCRYPTED:
+            return None
+        fheader = _unpack_file_header(data[:sizeFileHeader])
+        name_end = sizeFileHeader + fheader[_FH_FILENAME_LENGTH]
+        start = name_end + fheader[_FH_EXTRA_FIELD_LENGTH]
+        end = start + zinfo.compress_size
+        if end > len(data):
+            return None
+        self._check_file_header(zinfo, fheader, bytes(data[sizeFileHeader:name_end]))
+
+        data = data[start:end]
+        decompressor = _get_decompressor(zinfo.compress_type)
+        if decompressor is not None:
+            data = decompressor.decompress(data)
+            if zinfo.compress_type == ZIP_DEFLATED:
+                data += decompressor.flush()
+        data = bytes(data[:zinfo.file_size])
+        if crc32(data) != zinfo.CRC:
+            raise BadZipFile("Bad CRC-32 for file %r" % zinfo.filename)
+        return data
 
-    def _open_to_write(self, zinfo, force_zip64=False):
+    def _open_to_write(self, zinfo, force_zip64=False, max_workers=None):
         if force_zip64 and not self._allowZip64:
             raise ValueError(
                 "force_zip64 is True, but allowZip64 was False when opening "
@@ -1852,7 +4353,7 @@ class ZipFile:
         self.fp.write(zinfo.FileHeader(zip64))
 
         self._writing = True
-        return _ZipWriteFile(self, zinfo, zip64)
+        return _ZipWriteFile(self, zinfo, zip64, max_workers)
 
     def extract(self, member, path=None, pwd=None):
         """Extract a member from the archive to the current working directory,
@@ -1956,7 +4457,15 @@ class ZipFile:
 
         with self.open(member, pwd=pwd) as source, \
              open(targetpath, "wb") as target:
-            shutil.copyfileobj(source, target)
+            # CHEVAH-FIX
+            # Reuse one buffer, instead of a new bytes object for each chunk.
+            # An overridden _ZipExtFile is read through its read().
+            if self._ZipExtFile is not ZipExtFile:
+                shutil.copyfileobj(source, target)
+            else:
+                with memoryview(bytearray(shutil.COPY_BUFSIZE)) as buffer:
+                    while n := source.readinto(buffer):
+                        target.write(buffer[:n])
 
         return targetpath
 
@@ -1984,9 +4493,9 @@ class ZipFile:
                                    " would require ZIP64 extensions")
 
     def write(self, filename, arcname=None,
-              compress_type=None, compresslevel=None):
+              compress_type=None, compresslevel=None, *, max_workers=None):
         """Put the bytes from filename into the archive under the name
-        arcname."""
+        arcname.  See open() for max_workers."""
         if not self.fp:
             raise ValueError(
                 "Attempt to write to ZIP archive that was already closed")
@@ -2013,8 +4522,119 @@ class ZipFile:
             else:
                 zinfo.compress_level = self.compresslevel
 
-            with open(filename, "rb") as src, self.open(zinfo, 'w') as dest:
-                shutil.copyfileobj(src, dest, 1024*8)
+            # CHEVAH-FIX
+            with open(filename, "rb") as src, \
+                    self.open(zinfo, 'w', max_workers=max_workers) as dest:
+                shutil.copyfileobj(
+                    src, dest, 1 << 20 if max_workers else 1024*8)
+
+    # CHEVAH-FIX
+    def write_many(self, filenames, compress_type=None, compresslevel=None,
+                   *, max_workers=None, use_processes=False):
+        """Put files and directory trees into the archive, compressing
+        them concurrently.
+
+        filenames holds paths, or (path, arcname) pairs, with arcname
+        defaulting as for write().  Directories are added with their
+        content, walked in name order with os.scandir(), or only their
+        content with an empty arcname; other kinds of files are skipped.
+
+        Files are compressed on a pool of max_workers threads, or
+        processes with use_processes, and added in the order they were
+        walked, so the archive does not depend on the scheduling.  At
+        most twice max_workers compressed files wait to be added, each
+        in memory up to MAX_SPILL_MEMORY bytes, and in a temporary file
+        above.
+        """
+        if not self.fp:
+            raise ValueError(
+                "Attempt to write to ZIP archive that was already closed")
+        if self._writing:
+            raise ValueError(
+                "Can't write to ZIP archive while an open writing handle exists"
+            )
+        if compress_type is None:
+            compress_type = self.compression
+        if compresslevel is None:
+            compresslevel = self.compresslevel
+        _check_compression(compress_type)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if use_processes:
+            from concurrent.futures import ProcessPoolExecutor as Executor
+        else:
+            from concurrent.futures import ThreadPoolExecutor as Executor
+
+        pending = collections.deque()
+        with Executor(max_workers) as executor:
+            try:
+                for filename, arcname in _walk_files(filenames):
+                    zinfo = ZipInfo.from_file(
+                        filename, arcname,
+                        strict_timestamps=self._strict_timestamps)
+                    future = None
+                    if not zinfo.is_dir():
+                        zinfo.compress_type = compress_type
+                        zinfo.compress_level = compresslevel
+                        future = executor.submit(
+                            _compress_file, filename, compress_type,
+                            compresslevel, self.MAX_SPILL_MEMORY)
+                    pending.append((zinfo, future))
+                    if len(pending) > 2 * max_workers:
+                        self._write_compressed(*pending.popleft())
+                while pending:
+                    self._write_compressed(*pending.popleft())
+            finally:
+                for zinfo, future in pending:
+                    if future is not None and not future.cancel():
+                        try:
+                            spill_path = future.result()[1]
+                        except BaseException:
+                            continue
+                        if spill_path is not None:
+                            os.remove(spill_path)
+
+    # CHEVAH-FIX
+    def _write_compressed(self, zinfo, future):
+        """Add the member zinfo compressed by _compress_file(), or the
+        directory zinfo when future is None."""
+        if future is None:
+            zinfo.compress_size = 0
+            zinfo.CRC = 0
+            self.mkdir(zinfo)
+            return
+        data, spill_path, crc, file_size, compress_size = future.result()
+        try:
+            zinfo.CRC = crc
+            zinfo.file_size = file_size
+            zinfo.compress_size = compress_size
+            zinfo.flag_bits = _MASK_UTF_FILENAME
+            if zinfo.compress_type == ZIP_LZMA:
+                # Compressed data includes an end-of-stream (EOS) marker
+                zinfo.flag_bits |= _MASK_COMPRESS_OPTION_1
+            # The sizes are known, so the local header is written final,
+            # without a data descriptor even when not seekable.
+            zip64 = file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT
+            if zip64 and not self._allowZip64:
+                raise LargeZipFile("Filesize would require ZIP64 extensions")
+            with self._lock:
+                if self._seekable:
+                    self.fp.seek(self.start_dir)
+                zinfo.header_offset = self.fp.tell()
+                self._writecheck(zinfo)
+                self._didModify = True
+                self.fp.write(zinfo.FileHeader(zip64))
+                if spill_path is None:
+                    self.fp.write(data)
+                else:
+                    with open(spill_path, 'rb') as src:
+                        shutil.copyfileobj(src, self.fp, 1 << 20)
+                self.start_dir = self.fp.tell()
+                self.filelist.append(zinfo)
+                self.NameToInfo[zinfo.filename] = zinfo
+        finally:
+            if spill_path is not None:
+                os.remove(spill_path)
 
     def writestr(self, zinfo_or_arcname, data,
                  compress_type=None, compresslevel=None):
@@ -2111,6 +4731,16 @@ class ZipFile:
             fp = self.fp
             self.fp = None
             self._fpclose(fp)
+            # CHEVAH-FIX
+            nested, self._nested = self._nested, {}
+            for spill, _ in nested.values():
+                if spill is not None and not isinstance(spill, bytes):
+                    try:
+                        spill.close()
+                    except BufferError:
+                        # Nested archives are still open, the mapping is
+                        # closed once they are garbage collected.
+                        pass
 
     def _write_end_record(self):
         for zinfo in self.filelist:         # write central directory
@@ -2215,6 +4845,836 @@ class ZipFile:
             fp.close()
 
 
+# CHEVAH-FIX
+def _unpickle_zipfile(cls, filename, kwargs, index):
+    zipfile = cls.__new__(cls)
+    zipfile._pickled_index = index
+    try:
+        zipfile.__init__(filename, **kwargs)
+    finally:
+        zipfile._pickled_index = None
+    return zipfile
+
+
+# CHEVAH-FIX
+# The ZipFile and ZipFilePool instances alive in the process, reset in
+# forked children.
+_live_zipfiles = weakref.WeakSet()
+_live_pools = weakref.WeakSet()
+
+
+# CHEVAH-FIX
+def _after_fork_in_child():
+    for zipfile in list(_live_zipfiles):
+        zipfile._after_fork()
+    for pool in list(_live_pools):
+        pool._lock = threading.Lock()
+    ZipFilePool._default_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# CHEVAH-FIX
+class _PoolEntry:
+    """A ZipFile of a ZipFilePool, with its users and the identity of its
+    file."""
+
+    def __init__(self, zipfile, ident, checked):
+        self.zipfile = zipfile
+        self.ident = ident
+        self.checked = checked
+        self.refs = 0
+        self.members = len(zipfile.filelist)
+        self.detached = False
+
+
+# CHEVAH-FIX
+class _PoolLease:
+    """Context manager releasing a ZipFile to its pool on exit."""
+
+    def __init__(self, pool, zipfile):
+        self._pool = pool
+        self.zipfile = zipfile
+
+    def __enter__(self):
+        return self.zipfile
+
+    def __exit__(self, type, value, traceback):
+        self._pool.release(self.zipfile)
+
+
+# CHEVAH-FIX
+class ZipFilePool:
+    """Pool of shared ZipFile instances reading archives from paths.
+
+    acquire() returns the ZipFile already open for a path and the same
+    keyword arguments, after checking that the file was not replaced,
+    from its size, modification time and inode.  The check is done at
+    most every check_interval seconds, so getting a hot archive is mostly
+    a dict lookup.  Each acquire() has to be matched by a release(), or
+    use open() as a context manager; shared instances must not be closed
+    by their users.
+
+    Archives nobody uses stay open until more than max_open archives, or
+    more than max_members members, are open; the least recently used are
+    closed first.  Replaced archives are closed once they are released.
+
+    default() returns a pool shared by the whole process.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_open=64, max_members=None, check_interval=1.0):
+        self.max_open = max_open
+        self.max_members = max_members
+        self.check_interval = check_interval
+        # Live entries by key, the least recently used first.
+        self._entries = collections.OrderedDict()
+        # All the entries with users, including the replaced ones.
+        self._handles = {}
+        self._members = 0
+        self._lock = threading.Lock()
+        _live_pools.add(self)
+
+    @classmethod
+    def default(cls):
+        """Return the pool shared by the whole process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def open(self, path, **kwargs):
+        """Return a context manager acquiring the ZipFile for path and
+        releasing it on exit."""
+        return _PoolLease(self, self.acquire(path, **kwargs))
+
+    def acquire(self, path, **kwargs):
+        """Return a shared ZipFile reading the archive at path.
+
+        Keyword arguments are passed to ZipFile, archives opened with
+        different ones are not shared.  Only mode 'r' is supported.
+        """
+        if kwargs.get('mode', 'r') != 'r':
+            raise ValueError("ZipFilePool only shares archives opened "
+                             "with mode 'r'")
+        path = os.path.abspath(os.fspath(path))
+        key = (path, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked < self.check_interval:
+                return self._use(key, entry)
+
+        st = os.stat(path)
+        ident = (st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.ident == ident:
+                entry.checked = now
+                return self._use(key, entry)
+
+        zipfile = ZipFile(path, **kwargs)
+        # The path might have been replaced since the stat above, identify
+        # the file which was opened.
+        try:
+            if isinstance(zipfile.fp, _BufferFile):
+                st = zipfile.fp.stat
+            else:
+                st = os.fstat(zipfile.fp.fileno())
+        except BaseException:
+            zipfile.close()
+            raise
+        ident = (st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+        to_close = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.ident == ident:
+                # Opened by another thread meanwhile.
+                to_close.append(zipfile)
+                zipfile = self._use(key, entry)
+            else:
+                if entry is not None:
+                    to_close.extend(self._detach(key, entry))
+                entry = _PoolEntry(zipfile, ident, now)
+                self._entries[key] = entry
+                self._members += entry.members
+                self._use(key, entry)
+                to_close.extend(self._evict())
+        for old in to_close:
+            old.close()
+        return zipfile
+
+    def release(self, zipfile):
+        """Give back a ZipFile returned by acquire()."""
+        to_close = []
+        with self._lock:
+            entry = self._handles.get(id(zipfile))
+            if entry is None or entry.zipfile is not zipfile:
+                raise ValueError("ZipFile was not acquired from this pool")
+            entry.refs -= 1
+            if not entry.refs:
+                del self._handles[id(zipfile)]
+                if entry.detached:
+                    to_close.append(zipfile)
+                else:
+                    to_close.extend(self._evict())
+        for old in to_close:
+            old.close()
+
+    def clear(self):
+        """Close the archives nobody uses and forget the others, which
+        are closed once released."""
+        to_close = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                to_close.extend(self._detach(key, entry))
+        for old in to_close:
+            old.close()
+
+    def _use(self, key, entry):
+        entry.refs += 1
+        self._handles[id(entry.zipfile)] = entry
+        self._entries.move_to_end(key)
+        return entry.zipfile
+
+    def _detach(self, key, entry):
+        """Remove entry from the pool, returning its ZipFile to close if
+        nobody uses it."""
+        del self._entries[key]
+        self._members -= entry.members
+        entry.detached = True
+        if entry.refs:
+            return []
+        return [entry.zipfile]
+
+    def _evict(self):
+        """Remove the least recently used idle entries over the limits,
+        returning their ZipFile to close."""
+        to_close = []
+        for key, entry in list(self._entries.items()):
+            if (len(self._entries) <= self.max_open and
+                    (self.max_members is None or
+                     self._members <= self.max_members)):
+                break
+            if not entry.refs:
+                to_close.extend(self._detach(key, entry))
+        return to_close
+
+
+# CHEVAH-FIX
+class _StreamInput:
+    """Forward-only reader over a file object, counting the bytes read
+    and taking back the bytes read past the end of a member."""
+
+    def __init__(self, file):
+        self._file = file
+        self._pending = b''
+        self.pos = 0
+
+    def read(self, n=-1):
+        """Read n bytes, fewer only at the end of the file."""
+        chunks = []
+        if self._pending:
+            if n < 0:
+                # Read to the end of the file after the pending bytes.
+                data = self._pending
+            else:
+                data = self._pending[:n]
+                n -= len(data)
+            self._pending = self._pending[len(data):]
+            chunks.append(data)
+        while n:
+            data = self._file.read(n)
+            if not data:
+                break
+            chunks.append(data)
+            if n > 0:
+                n -= len(data)
+        data = b''.join(chunks)
+        self.pos += len(data)
+        return data
+
+    def unread(self, data):
+        self._pending = data + self._pending
+        self.pos -= len(data)
+
+
+# CHEVAH-FIX
+class _ZipStreamFile(io.BufferedIOBase):
+    """Forward-only file of a member, returned by ZipStreamReader."""
+
+    # Compressed bytes read at once.
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, stream, zinfo, pwd, zip64):
+        self._stream = stream
+        self._zinfo = zinfo
+        self._zip64 = zip64
+        self.name = zinfo.filename
+        self.mode = 'rb'
+        self._compress_type = zinfo.compress_type
+        self._decompressor = _get_decompressor(zinfo.compress_type)
+        self._descriptor = zinfo.flag_bits & _MASK_USE_DATA_DESCRIPTOR
+        # With a data descriptor, the sizes are usually left as zero in
+        # the local header and the end of the data is found while reading.
+        if self._descriptor and not zinfo.compress_size:
+            self._compress_left = None
+        else:
+            self._compress_left = zinfo.compress_size
+        self._size = 0
+        self._crc = crc32(b'')
+        self._raw = b''
+        self._scan = b''
+        self._readbuffer = b''
+        self._eof = False
+
+        self._decrypter = None
+        if pwd:
+            if self._compress_left is None and self._decompressor is None:
+                raise NotImplementedError(
+                    "encrypted stored member with a data descriptor")
+            if self._descriptor:
+                check_byte = (zinfo._raw_time >> 8) & 0xff
+            else:
+                check_byte = (zinfo.CRC >> 24) & 0xff
+            self._decrypter = _ZipDecrypter(pwd)
+            header = stream.read(12)
+            if len(header) != 12:
+                raise EOFError
+            if self._compress_left is not None:
+                self._compress_left -= 12
+            if self._decrypter(header)[11] != check_byte:
+                raise RuntimeError("Bad password for file %r" % zinfo.orig_filename)
+
+    def readable(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        return True
+
+    def read(self, n=-1):
+        if self.closed:
+            raise ValueError("read from closed file.")
+        chunks = [self._readbuffer]
+        size = len(self._readbuffer)
+        while (n is None or n < 0 or size < n) and not self._eof:
+            data = self._read_chunk()
+            chunks.append(data)
+            size += len(data)
+        data = b''.join(chunks)
+        if n is None or n < 0 or size <= n:
+            self._readbuffer = b''
+            return data
+        self._readbuffer = data[n:]
+        return data[:n]
+
+    def read1(self, n=-1):
+        if self.closed:
+            raise ValueError("read from closed file.")
+        if not self._readbuffer and not self._eof:
+            self._readbuffer = self._read_chunk()
+        if n is None or n < 0:
+            n = len(self._readbuffer)
+        data = self._readbuffer[:n]
+        self._readbuffer = self._readbuffer[n:]
+        return data
+
+    def _skip(self):
+        """Move the stream to the end of the member."""
+        self._readbuffer = b''
+        if (self._compress_left is not None and not self._descriptor
+                and not self._eof):
+            # Known size, no need to decompress.
+            while self._compress_left > 0:
+                data = self._stream.read(
+                    min(self.CHUNK_SIZE, self._compress_left))
+                if not data:
+                    raise EOFError
+                self._compress_left -= len(data)
+            self._eof = True
+        while not self._eof:
+            self._read_chunk()
+
+    def _read_chunk(self):
+        decompressor = self._decompressor
+        if self._compress_left is None and decompressor is None:
+            data = self._scan_stored()
+        else:
+            tail = b''
+            if self._compress_type == ZIP_DEFLATED:
+                tail = decompressor.unconsumed_tail
+            if tail:
+                # The raw bytes of the tail, to give back what was read
+                # past the end of the data.
+                raw = self._raw[len(self._raw) - len(tail):]
+                data = tail
+            else:
+                n = self.CHUNK_SIZE
+                if self._compress_left is not None:
+                    n = min(n, self._compress_left)
+                raw = self._stream.read(n) if n > 0 else b''
+                if not raw and n > 0:
+                    raise EOFError
+                if self._compress_left is not None:
+                    self._compress_left -= len(raw)
+                data = raw
+                if self._decrypter is not None:
+                    data = self._decrypter(data)
+            self._raw = raw
+
+            if decompressor is None:
+                self._eof = self._compress_left <= 0
+            elif self._compress_type == ZIP_DEFLATED:
+                data = decompressor.decompress(data, self.CHUNK_SIZE)
+                self._eof = (decompressor.eof or
+                             self._compress_left is not None and
+                             self._compress_left <= 0 and
+                             not decompressor.unconsumed_tail)
+                if self._eof:
+                    # flush() adds the stale tail to unused_data.
+                    unused = decompressor.unused_data
+                    data += decompressor.flush()
+            else:
+                data = decompressor.decompress(data)
+                self._eof = (decompressor.eof or
+                             self._compress_left is not None and
+                             self._compress_left <= 0)
+                unused = getattr(decompressor, 'unused_data', b'')
+
+            if self._eof and decompressor is not None:
+                if self._compress_left is None:
+                    if unused:
+                        self._stream.unread(self._raw[len(self._raw) - len(unused):])
+                elif self._compress_left > 0:
+                    self._skip_raw()
+
+        self._size += len(data)
+        self._crc = crc32(data, self._crc)
+        if self._eof:
+            self._finish()
+        return data
+
+    def _skip_raw(self):
+        # Skip the bytes left after the end of the compressed data.
+        data = self._stream.read(self._compress_left)
+        if len(data) != self._compress_left:
+            raise EOFError
+        self._compress_left = 0
+
+    def _descriptor_size(self):
+        return struct.calcsize('<LQQ' if self._zip64 else '<LLL')
+
+    def _scan_stored(self):
+        # A stored member of unknown size ends at a data descriptor with
+        # the CRC-32 and size of the data before it.
+        dd_size = 4 + self._descriptor_size()
+        fmt = '<LQ' if self._zip64 else '<LL'
+        raw = self._stream.read(self.CHUNK_SIZE)
+        buf = self._scan + raw
+        keep = max(len(buf) - dd_size + 1, 0)
+        pos = buf.find(b'PK\x07\x08')
+        while pos >= 0:
+            if len(buf) - pos < dd_size:
+                keep = min(keep, pos)
+                break
+            crc, size = struct.unpack_from(fmt, buf, pos + 4)
+            if (size == self._size + pos and
+                    crc == crc32(buf[:pos], self._crc)):
+                self._stream.unread(buf[pos:])
+                self._scan = b''
+                self._eof = True
+                return buf[:pos]
+            pos = buf.find(b'PK\x07\x08', pos + 1)
+        if not raw:
+            raise EOFError
+        self._scan = buf[keep:]
+        return buf[:keep]
+
+    def _finish(self):
+        zinfo = self._zinfo
+        if self._descriptor:
+            data = self._stream.read(4)
+            if data == struct.pack('<L', _DD_SIGNATURE):
+                data = b''
+            data += self._stream.read(self._descriptor_size() - len(data))
+            if len(data) != self._descriptor_size():
+                raise BadZipFile("Truncated data descriptor")
+            (zinfo.CRC, zinfo.compress_size, zinfo.file_size) = struct.unpack(
+                '<LQQ' if self._zip64 else '<LLL', data)
+        if self._crc != zinfo.CRC:
+            raise BadZipFile("Bad CRC-32 for file %r" % self.name)
+        if self._size != zinfo.file_size:
+            raise BadZipFile("Bad size for file %r" % self.name)
+
+
+# CHEVAH-FIX
+class ZipStreamReader:
+    """Forward-only reader of a ZIP archive from a file object which does
+    not have to be seekable, like a pipe or a socket.
+
+    Iterating yields (zinfo, file) for each member, in the order of the
+    archive, from its local header.  file is a binary file object valid
+    until the next member is requested, when its unread data is skipped.
+    For members with a data descriptor, the CRC-32 and sizes of zinfo are
+    set once the data is read.
+
+    After the last member, the central directory is read.  When verify
+    is True, it must match the members which were read.  infolist() then
+    returns the ZipInfo objects of the central directory, with the
+    metadata missing from the local headers.
+
+    Stored members with a data descriptor and no sizes in their local
+    header are delimited by searching for their data descriptor, which
+    must have a signature.
+    """
+
+    def __init__(self, file, pwd=None, *, metadata_encoding=None,
+                 verify=True):
+        if pwd and not isinstance(pwd, bytes):
+            raise TypeError("pwd: expected bytes, got %s" % type(pwd).__name__)
+        self._stream = _StreamInput(file)
+        self.pwd = pwd
+        self.metadata_encoding = metadata_encoding
+        self._verify = verify
+        self._members = []
+        self._infolist = None
+        self._started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop reading, the file object is left open to the caller."""
+        self._stream = None
+
+    def infolist(self):
+        """Return the ZipInfo objects of the central directory, once all
+        the members were read."""
+        if self._infolist is None:
+            raise ValueError("The central directory was not read yet")
+        return self._infolist
+
+    def namelist(self):
+        return [zinfo.filename for zinfo in self.infolist()]
+
+    def __iter__(self):
+        if self._started:
+            raise ValueError("The archive can only be read once")
+        self._started = True
+        return self._iter_members()
+
+    def _iter_members(self):
+        stream = self._stream
+        first = None
+        while True:
+            if stream is not self._stream:
+                raise ValueError("I/O operation on closed reader.")
+            offset = stream.pos
+            signature = stream.read(4)
+            if signature == stringFileHeader:
+                if first is None:
+                    first = offset
+                zinfo, zip64 = self._read_header(signature, offset)
+                pwd = None
+                if zinfo.flag_bits & _MASK_ENCRYPTED:
+                    pwd = self.pwd
+                member = _ZipStreamFile(stream, zinfo, pwd, zip64)
+                self._members.append(zinfo)
+                try:
+                    yield zinfo, member
+                    member._skip()
+                finally:
+                    member.close()
+            elif signature in (stringCentralDir, stringEndArchive,
+                               stringEndArchive64):
+                self._read_central_dir(signature, first or 0)
+                return
+            elif not signature and first is None:
+                raise BadZipFile("File is not a zip file")
+            else:
+                raise BadZipFile("Bad magic number for file header")
+
+    def _read_header(self, signature, offset):
+        data = signature + self._stream.read(sizeFileHeader - 4)
+        fheader = _unpack_file_header(data)
+        if fheader[_FH_EXTRACT_VERSION] > MAX_EXTRACT_VERSION:
+            raise NotImplementedError("zip file version %.1f" %
+                                      (fheader[_FH_EXTRACT_VERSION] / 10))
+        fname = self._stream.read(fheader[_FH_FILENAME_LENGTH])
+        extra = self._stream.read(fheader[_FH_EXTRA_FIELD_LENGTH])
+        if (len(fname) != fheader[_FH_FILENAME_LENGTH] or
+                len(extra) != fheader[_FH_EXTRA_FIELD_LENGTH]):
+            raise BadZipFile("Truncated file header")
+
+        flags = fheader[_FH_GENERAL_PURPOSE_FLAG_BITS]
+        if flags & _MASK_UTF_FILENAME:
+            filename = fname.decode('utf-8')
+        else:
+            filename = fname.decode(self.metadata_encoding or 'cp437')
+        zinfo = ZipInfo(filename)
+        zinfo.extra = extra
+        zinfo.header_offset = offset
+        zinfo.extract_version = fheader[_FH_EXTRACT_VERSION]
+        zinfo.flag_bits = flags
+        zinfo.compress_type = fheader[_FH_COMPRESSION_METHOD]
+        t = fheader[_FH_LAST_MOD_TIME]
+        d = fheader[_FH_LAST_MOD_DATE]
+        zinfo._raw_time = t
+        zinfo.date_time = ((d>>9)+1980, (d>>5)&0xF, d&0x1F,
+                           t>>11, (t>>5)&0x3F, (t&0x1F) * 2)
+        zinfo.CRC = fheader[_FH_CRC]
+        zinfo.compress_size = fheader[_FH_COMPRESSED_SIZE]
+        zinfo.file_size = fheader[_FH_UNCOMPRESSED_SIZE]
+        zinfo._decodeExtra(crc32(fname))
+        if flags & _MASK_COMPRESSED_PATCH:
+            raise NotImplementedError("compressed patched data (flag bit 5)")
+        if flags & _MASK_STRONG_ENCRYPTION:
+            raise NotImplementedError("strong encryption (flag bit 6)")
+        if flags & _MASK_ENCRYPTED and not self.pwd:
+            raise RuntimeError("File %r is encrypted, password "
+                               "required for extraction" % filename)
+        zip64 = any(field.id == 0x0001 for field in _Extra.split(extra))
+        return zinfo, zip64
+
+    def _read_central_dir(self, signature, concat):
+        data = signature + self._stream.read()
+        infolist = []
+        pos = 0
+        while data[pos:pos + 4] == stringCentralDir:
+            if len(data) - pos < sizeCentralDir:
+                raise BadZipFile("Truncated central directory")
+            centdir = struct.unpack_from(structCentralDir, data, pos)
+            name_start = pos + sizeCentralDir
+            extra_start = name_start + centdir[_CD_FILENAME_LENGTH]
+            comment_start = extra_start + centdir[_CD_EXTRA_FIELD_LENGTH]
+            pos = comment_start + centdir[_CD_COMMENT_LENGTH]
+            infolist.append(_make_zipinfo(
+                ZipInfo, centdir, data[name_start:extra_start],
+                data[extra_start:comment_start], data[comment_start:pos],
+                concat, self.metadata_encoding))
+
+        if self._verify:
+            if len(infolist) != len(self._members):
+                raise BadZipFile(
+                    "Central directory has %d members, %d were read"
+                    % (len(infolist), len(self._members)))
+            for zinfo, member in zip(infolist, self._members):
+                if ((zinfo.orig_filename, zinfo.header_offset, zinfo.CRC,
+                     zinfo.compress_size, zinfo.file_size) !=
+                    (member.orig_filename, member.header_offset, member.CRC,
+                     member.compress_size, member.file_size)):
+                    raise BadZipFile(
+                        "Central directory and local header of %r differ"
+                        % member.orig_filename)
+        self._infolist = infolist
+
+
+# CHEVAH-FIX
+class AsyncZipFile:
+    """asyncio interface to a ZipFile.
+
+    Reading, decompressing and extracting members run on an executor, so
+    they don't block the event loop.  Unless an executor is given, a
+    ThreadPoolExecutor of max_workers threads is created, and shut down
+    by close().  With max_concurrency, at most that many calls run on the
+    executor at once, which bounds the work queued by this archive on a
+    shared executor.
+
+    Use create() to open an archive without blocking, or wrap a ZipFile
+    already open.  The members are listed from memory, so infolist(),
+    namelist() and getinfo() are not coroutines.
+    """
+
+    def __init__(self, zipfile, *, executor=None, max_workers=None,
+                 max_concurrency=None):
+        self.zipfile = zipfile
+        self._executor = executor
+        self._own_executor = executor is None
+        self._max_workers = max_workers
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @classmethod
+    async def create(cls, file, mode='r', *, executor=None, max_workers=None,
+                     max_concurrency=None, **kwargs):
+        """Open a ZipFile on the executor and return it wrapped.
+
+        Arguments other than the ones of AsyncZipFile are passed to
+        ZipFile.
+        """
+        self = cls(None, executor=executor, max_workers=max_workers,
+                   max_concurrency=max_concurrency)
+        try:
+            self.zipfile = await self._run(ZipFile, file, mode, **kwargs)
+        except BaseException:
+            self._shutdown()
+            raise
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(
+                self._max_workers, thread_name_prefix='AsyncZipFile')
+        return self._executor
+
+    async def _run(self, func, *args, **kwargs):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if self._max_concurrency is None:
+            return await loop.run_in_executor(self._get_executor(), call)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            return await loop.run_in_executor(self._get_executor(), call)
+
+    def infolist(self):
+        """Return a list of ZipInfo instances for the members."""
+        return self.zipfile.infolist()
+
+    def namelist(self):
+        """Return a list of the member names."""
+        return self.zipfile.namelist()
+
+    def getinfo(self, name):
+        """Return the ZipInfo of the member name."""
+        return self.zipfile.getinfo(name)
+
+    async def read(self, name, pwd=None):
+        """Return the bytes of the member name."""
+        return await self._run(self.zipfile.read, name, pwd)
+
+    async def read_many(self, names, pwd=None):
+        """Return a dict mapping each name in names to its bytes."""
+        return await self._run(self.zipfile.read_many, names, pwd)
+
+    async def iter_read(self, names, pwd=None):
+        """Yield (zinfo, bytes) for each member in names, in the order
+        of ZipFile.iter_read().
+
+        The next member is only read when the previous one was consumed.
+        """
+        import asyncio
+        iterator = self.zipfile.iter_read(names, pwd)
+        pending = None
+        try:
+            while True:
+                # Shielded, so a cancelled consumer does not leave next()
+                # running in the executor while the iterator is closed.
+                pending = asyncio.ensure_future(
+                    self._run(next, iterator, None))
+                item = await asyncio.shield(pending)
+                pending = None
+                if item is None:
+                    break
+                yield item
+        finally:
+            if pending is not None:
+                try:
+                    await pending
+                except Exception:
+                    pass
+            iterator.close()
+
+    async def open(self, name, pwd=None):
+        """Return an AsyncZipExtFile reading the member name."""
+        file = await self._run(self.zipfile.open, name, 'r', pwd)
+        return AsyncZipExtFile(self, file)
+
+    async def extract(self, member, path=None, pwd=None):
+        """Extract a member, see ZipFile.extract()."""
+        return await self._run(self.zipfile.extract, member, path, pwd)
+
+    async def extractall(self, path=None, members=None, pwd=None):
+        """Extract members concurrently, see ZipFile.extractall()."""
+        import asyncio
+        if members is None:
+            members = self.zipfile.namelist()
+        await asyncio.gather(*[self.extract(member, path, pwd)
+                               for member in members])
+
+    async def close(self):
+        """Close the ZipFile, and the executor created for it."""
+        if self.zipfile is not None:
+            try:
+                await self._run(self.zipfile.close)
+            finally:
+                self._shutdown()
+
+    def _shutdown(self):
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# CHEVAH-FIX
+class AsyncZipExtFile:
+    """asyncio interface to a member file opened by AsyncZipFile.open().
+
+    Each call reads on the executor of the archive; data is only read
+    when awaited, so a slow consumer holds back the reads.  Calls on one
+    file must not run concurrently.
+    """
+
+    def __init__(self, archive, file):
+        self._archive = archive
+        self.file = file
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        line = await self.readline()
+        if not line:
+            raise StopAsyncIteration
+        return line
+
+    async def read(self, n=-1):
+        """Return up to n bytes, or the rest of the member."""
+        return await self._archive._run(self.file.read, n)
+
+    async def read1(self, n=-1):
+        """Return up to n bytes, with at most one read from the archive."""
+        return await self._archive._run(self.file.read1, n)
+
+    async def readline(self, limit=-1):
+        """Return the next line."""
+        return await self._archive._run(self.file.readline, limit)
+
+    async def iter_chunks(self, chunk_size=None):
+        """Yield the member in chunks of up to chunk_size bytes."""
+        if chunk_size is None:
+            chunk_size = io.DEFAULT_BUFFER_SIZE * 8
+        while True:
+            data = await self.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    async def close(self):
+        """Close the member file."""
+        await self._archive._run(self.file.close)
+
+
 class PyZipFile(ZipFile):
     """Class to create ZIP archives with Python library files and packages."""
 
@@ -2407,6 +5867,9 @@ def main(args=None):
                        help='Test if a zipfile is valid')
     parser.add_argument('--metadata-encoding', metavar='<encoding>',
                         help='Specify encoding of member names for -l, -e and -t')
+    # CHEVAH-FIX
+    parser.add_argument('--jobs', metavar='<N>', type=int,
+                        help='Compress with N parallel jobs for -c')
     args = parser.parse_args(args)
 
     encoding = args.metadata_encoding
@@ -2421,7 +5884,9 @@ def main(args=None):
 
     elif args.list is not None:
         src = args.list
-        with ZipFile(src, 'r', metadata_encoding=encoding) as zf:
+        # CHEVAH-FIX
+        with ZipFile(src, 'r', metadata_encoding=encoding,
+                     columnar=True) as zf:
             zf.printdir()
 
     elif args.extract is not None:
@@ -2450,13 +5915,20 @@ def main(args=None):
             # else: ignore
 
         with ZipFile(zip_name, 'w') as zf:
+            # CHEVAH-FIX
+            members = []
             for path in files:
                 zippath = os.path.basename(path)
                 if not zippath:
                     zippath = os.path.basename(os.path.dirname(path))
                 if zippath in ('', os.curdir, os.pardir):
                     zippath = ''
-                addToZip(zf, path, zippath)
+                if args.jobs:
+                    members.append((path, zippath))
+                else:
+                    addToZip(zf, path, zippath)
+            if members:
+                zf.write_many(members, ZIP_DEFLATED, max_workers=args.jobs)
 
 
 from ._path import (  # noqa: E402
@@ -2465,3 +5937,32 @@ from ._path import (  # noqa: E402
     # used privately for tests
     CompleteDirs,  # noqa: F401
 )
+
+
+# CHEVAH-FIX
+# zipfile.Path lists and resolves directories with the name index of its
+# ZipFile, instead of scanning all the names.
+def _path_iterdir(self):
+    if not self.is_dir():
+        raise ValueError("Can't listdir a file")
+    return map(self._next, self.root._name_index().listdir(self.at))
+
+
+def _path_exists(self):
+    return self.root._name_index().exists(self.at)
+
+
+def _complete_dirs_resolve_dir(self, name):
+    """
+    If the name represents a directory, return that name
+    as a directory (with the trailing slash).
+    """
+    index = self._name_index()
+    dirname = name + '/'
+    dir_match = not index.exists(name) and index.exists(dirname)
+    return dirname if dir_match else name
+
+
+Path.iterdir = _path_iterdir
+Path.exists = _path_exists
+CompleteDirs.resolve_dir = _complete_dirs_resolve_dir